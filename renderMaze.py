@@ -1,8 +1,70 @@
-import tkinter as tk
-import tkinter.filedialog as tkf
-import Search, Robot
+import array, base64, collections, copy, csv, functools, hashlib, importlib, importlib.util, json, math, mmap, os, \
+    pickle, random, signal, struct, sys, tempfile, time, types, zlib
 
-import os, sys, tempfile
+try:
+    import tkinter as tk
+    import tkinter.filedialog as tkf
+    import tkinter.messagebox as tkmb
+except ImportError:
+    # Python built without Tk. The batch, generator and benchmark modes need no window, so stand in for the names
+    # used while defining the window classes and drawing on an OffscreenCanvas.
+    tk = types.SimpleNamespace(Frame=object, Toplevel=object, PhotoImage=None, NW="nw", NORMAL="normal",
+                               HIDDEN="hidden")
+    tkf = None
+    tkmb = None
+HAVE_TK = tkf is not None
+
+
+def lazyImport(name):
+    """Module name, imported the first time one of its attributes is used instead of now. Keeps starting the
+    program (or a worker process, which imports it again on platforms without fork) quick when the module turns
+    out not to be needed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError("No module named %r" % name, name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    (parent, _, child) = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)  # As importing it would, for other modules' "import a.b"
+    spec.loader.exec_module(module)
+    return module
+
+
+# Only needed by the command line, batches, workers, live viewing or benchmarks, and slow to import
+argparse = lazyImport("argparse")
+asyncio = lazyImport("asyncio")
+futures = lazyImport("concurrent.futures")
+multiprocessing = lazyImport("multiprocessing")
+statistics = lazyImport("statistics")
+tracemalloc = lazyImport("tracemalloc")
+Search = lazyImport("Search")
+
+MAX_STEPS = 10000  # Give up on robots which never return STOP
+DEFAULT_ROBOT = "Robot:Robot"  # module:Class played when no --robot is given
+LOAD_ERRORS = (OSError, ValueError, IndexError, struct.error, zlib.error)  # Raised by reading a bad maze or replay
+BINARY_MAZE_EXT = ".bmaze"  # File name ending of mazes saved in the binary format
+MAZE_FILETYPES = (("Maze Files", "*.maze"), ("Maze Files", "*.txt"), ("Binary Maze Files", "*" + BINARY_MAZE_EXT))
+BATCH_CONCURRENCY = 16  # Runs an in-process batch plays at once
+MAX_BOARD = 2000  # Largest number of rows or columns the Generate Board tool accepts
+TRAIL_POINTS = 20000  # Polyline vertices of trail kept before the oldest are forgotten
+CHECKPOINT_INTERVAL = 500  # Moves between in-memory checkpoints used to rewind a run
+MAZE_CACHE_SIZE = 256  # Parsed mazes kept in memory by each process
+METRICS_WINDOW = 10000  # Timing samples kept per step phase
+VERIFY_CELLS = 4000000  # Largest generated board checked with a flood fill by default
+ROOM_LIMIT = 20000  # Most rooms placed by the "rooms" generator
+GENERATED_TACTICS = ("random", "aggressive")  # Enemy tactics that need no predefined route
+BENCH_SIZES = (10, 32, 100, 316, 1000)  # Rows and columns of the benchmark mazes, from 10^2 to 1000^2 cells
+BENCH_STEPS = 2000  # Robot moves timed in each benchmark
+BENCH_FRAMES = 200  # Frames drawn with partial_render in each benchmark
+BENCH_REPEAT = 5  # Rounds of every benchmark, keeping the median of each, to keep out noise from the machine
+BENCH_MIN_TIME = 0.2  # Seconds each round at least spends moving, rendering and drawing frames, so quick ones repeat
+BENCH_TOLERANCE = 0.3  # Fraction by which a benchmark may be worse than its baseline before --baseline fails
+BENCH_NOISE_MS = 0.2  # Renders or frames this much slower than the baseline or less are noise, however small they are
+BENCH_NOISE_KB = 256  # Peak memory this much above the baseline or less is noise from the interpreter's own allocations
 
 
 class Dialog(tk.Toplevel):
@@ -79,6 +141,9 @@ class GenerateDialog(Dialog):
         self.cols = tk.IntVar(value=20)
         self.objects = tk.IntVar(value=0)
         self.density = tk.DoubleVar(value=.2)
+        self.algorithm = tk.StringVar(value="Search")
+        self.enemies = tk.IntVar(value=0)
+        self.seed = tk.StringVar(value="")
         tk.Label(master, text="Rows: ").grid(row=0, column=0)
         tk.Entry(master, textvariable=self.rows).grid(row=0, column=1)
         tk.Label(master, text="Cols: ").grid(row=1, column=0)
@@ -87,21 +152,37 @@ class GenerateDialog(Dialog):
         tk.Entry(master, textvariable=self.objects).grid(row=2, column=1)
         tk.Scale(master, label="Density: ", from_=0, to=1, resolution=.05, tick=.25, length=300, variable=self.density,
                  orient=tk.HORIZONTAL).grid(row=3, column=0, columnspan=2)
+        tk.Label(master, text="Algorithm: ").grid(row=4, column=0)
+        tk.OptionMenu(master, self.algorithm, "Search", *GENERATORS).grid(row=4, column=1)
+        tk.Label(master, text="Enemies: ").grid(row=5, column=0)
+        tk.Entry(master, textvariable=self.enemies).grid(row=5, column=1)
+        tk.Label(master, text="Seed: ").grid(row=6, column=0)
+        tk.Entry(master, textvariable=self.seed).grid(row=6, column=1)
 
     def validate(self):
         flag = True
-        if not (100 > self.rows.get() > 0):
+        if not (MAX_BOARD >= self.rows.get() > 0):
             flag = False
             self.rows.set(20)
-        if not (100 > self.cols.get() > 0):
+        if not (MAX_BOARD >= self.cols.get() > 0):
             flag = False
-            self.rows.set(20)
+            self.cols.set(20)
         if not (0 <= self.density.get() <= 1):
             flag = False
             self.density.set(.2)
         if not (0 <= self.objects.get() <= 30):
             flag = False
             self.objects.set(0)
+        if not (0 <= self.enemies.get() <= 30):
+            flag = False
+            self.enemies.set(0)
+        if self.seed.get().strip() and not self.seed.get().strip().isdigit():
+            flag = False
+            self.seed.set("")
+        if self.algorithm.get() != "Search" and not boardFits(self.rows.get(), self.cols.get(), self.algorithm.get()):
+            flag = False
+            self.rows.set(20)
+            self.cols.set(20)
         return flag
 
     def apply(self):
@@ -110,29 +191,411 @@ class GenerateDialog(Dialog):
         density = self.density.get()
         objects = self.objects.get()
         self.result = {"cols": cols, "rows": rows, "density": density, "items": objects}
+        if self.algorithm.get() != "Search":
+            # The seed is always fixed here so that Restart brings back the same board
+            seed = self.seed.get().strip()
+            self.result = {"generator": {"rows": rows, "cols": cols, "algorithm": self.algorithm.get(),
+                                         "density": density, "items": objects, "enemies": self.enemies.get(),
+                                         "seed": int(seed) if seed else random.randrange(2 ** 31)}}
 
 
-class MazeApp(tk.Frame):
+class Trail:
+    """The robot's path, held in a form whose size does not grow with the length of the run.
+
+    Moves continuing in the same direction move the last vertex of the current polyline instead of adding a new
+    one, polylines are split every SEGMENT vertices so that only the newest needs redrawing, and once more than
+    maxPoints vertices are held the oldest polylines are forgotten. Visit counts per cell are kept for the
+    heatmap and are bounded by the size of the board."""
+    SEGMENT = 256
+
+    def __init__(self, source, maxPoints=TRAIL_POINTS):
+        self.source = source  # the GameState moveList being followed
+        self.maxPoints = maxPoints
+        self.runs = []
+        self.first = 0  # how many polylines have been forgotten from the front of runs
+        self.points = 0
+        self.bumps = set()  # (row, col, direction) of every collision
+        self.visits = {}  # (row, col) -> number of moves ending there
+        self.consumed = 0  # moves of source already added
+        self.dirtyRun = None  # lowest polyline index (counting forgotten ones) changed since the last draw
+        self.newBumps = []
+        self.changedVisits = set()
+
+    def update(self):
+        """Add any moves appended to the source since the last call."""
+        moves = self.source
+        if self.consumed == 0 and len(moves):
+            (r, c, discard) = moves[0]
+            self.runs.append([(r, c)])
+            self.points = 1
+            self.visit((r, c))
+            self.markDirty(0)
+            self.consumed = 1
+        for n in range(self.consumed, len(moves)):
+            (lastR, lastC, discard) = moves[n - 1]
+            (r, c, direction) = moves[n]
+            self.add((lastR, lastC), (r, c), direction)
+        self.consumed = len(moves)
+
+    def visit(self, cell):
+        self.visits[cell] = self.visits.get(cell, 0) + 1
+        self.changedVisits.add(cell)
+
+    def markDirty(self, index):
+        if self.dirtyRun is None or index < self.dirtyRun:
+            self.dirtyRun = index
+
+    def markAllDirty(self):
+        self.dirtyRun = self.first
+        self.newBumps = list(self.bumps)
+        self.changedVisits = set(self.visits)
+
+    def clearChanges(self):
+        self.dirtyRun = None
+        self.newBumps = []
+        self.changedVisits = set()
+
+    def add(self, last, cell, direction):
+        self.visit(cell)
+        if cell == last:
+            # Collided with wall or wait
+            if direction and direction != "STOP" and (cell + (direction,)) not in self.bumps:
+                self.bumps.add(cell + (direction,))
+                self.newBumps.append(cell + (direction,))
+            return
+        run = self.runs[-1]
+        if len(run) >= 2 and _heading(run[-2], run[-1]) == _heading(run[-1], cell):
+            run[-1] = cell
+        elif len(run) >= self.SEGMENT:
+            self.runs.append([run[-1], cell])
+            self.points += 2
+        else:
+            run.append(cell)
+            self.points += 1
+        self.markDirty(self.first + len(self.runs) - 1)
+        while self.points > self.maxPoints and len(self.runs) > 1:
+            self.points -= len(self.runs.pop(0))
+            self.first += 1
+
+
+def _heading(a, b):
+    return ((b[0] > a[0]) - (b[0] < a[0]), (b[1] > a[1]) - (b[1] < a[1]))
+
+
+class BoardView:
+    """Draws a GameState onto a canvas through a pannable, zoomable viewport.
+
+    Only the cells inside the viewport get canvas items. The view keeps an index from each of those cells to its
+    items and remembers what it last drew there, so that partial_render only reconfigures the cells which can have
+    changed since the previous frame: those the robot passed through and those enemies left or entered. Once cells
+    shrink below RASTER_CELL pixels the board is instead drawn into a single PhotoImage, so the cost of a frame is
+    bounded by the size of the canvas rather than the size of the maze."""
     COLOURS = {0: "white", 1: "gray", 2: "green", 3: "blue", 4: "white", 5: "white", -1: "magenta", -2: "yellow",
                -3: "red"}
     ENEMY_COLS = {"predefined-known": "lightGreen", "predefined-unknown": "lightblue", "random": "orange",
                   "aggressive": "red"}
+    RASTER_CELL = 8  # pixels per cell below which the board is drawn as an image
+    MAX_CELL = 64
+    TRAIL_MODES = ("Lines", "Heatmap", "Off")
+    HEAT_COLS = ["#ffd8d8", "#ffb0b0", "#ff8888", "#ff6060", "#ff3030", "#e00000", "#a00000"]
+    BUMP = {"NORTH": (-1, 0), "SOUTH": (1, 0), "EAST": (0, 1), "WEST": (0, -1)}
+    PhotoImage = tk.PhotoImage  # what the board is drawn into when zoomed out
+
+    def __init__(self, canvas, gameState, width, height):
+        self.canvas = canvas
+        self.gameState = gameState
+        self.width = width
+        self.height = height
+        self.cellSize = 1
+        self.originRow = 0  # board coordinates of the top left corner of the canvas
+        self.originCol = 0
+        self.fitted = None  # board shape the viewport was last fitted to
+        self.image = None
+        self.cells = {}  # (row, col) -> background rectangle
+        self.objects = {}  # (row, col) -> object marker, hidden while the cell holds no object
+        self.enemies = {}  # (row, col) -> enemy oval, hidden while the cell holds no enemy
+        self.drawn = {}  # (row, col) -> (value, enemy colour) as last drawn
+        self.enemyCells = set()
+        self.robot = None
+        self.carried = None
+        self.drawnMoves = 0  # moveList entries whose cells have been redrawn
+        self.trailMode = "Lines"
+        self.trail = Trail(gameState.moveList)
+        self.trailItems = []  # one line per polyline held by the trail, oldest first
+        self.trailFirst = 0  # trail polyline index drawn by trailItems[0]
+        self.heatItems = {}  # (row, col) -> heatmap rectangle
+
+    def fit(self):
+        board = self.gameState.game.board
+        self.cellSize = min(self.width / board.col, self.height / board.row)
+        self.originRow = 0
+        self.originCol = 0
+        self.fitted = (board.row, board.col)
+
+    def isRaster(self):
+        return self.cellSize < self.RASTER_CELL
+
+    def toScreen(self, r, c):
+        return ((c - self.originCol) * self.cellSize, (r - self.originRow) * self.cellSize)
+
+    def cellAt(self, x, y):
+        """The (row, col) of the cell under canvas position x, y, or None if it is off the board."""
+        board = self.gameState.game.board
+        r = int(self.originRow + y / self.cellSize)
+        c = int(self.originCol + x / self.cellSize)
+        if 0 <= r < board.row and 0 <= c < board.col:
+            return (r, c)
+        return None
 
-    def __init__(self, master, game, *args, **kwargs):
+    def visibleRange(self):
+        board = self.gameState.game.board
+        r0 = max(0, int(self.originRow))
+        c0 = max(0, int(self.originCol))
+        r1 = min(board.row, int(math.ceil(self.originRow + self.height / self.cellSize)))
+        c1 = min(board.col, int(math.ceil(self.originCol + self.width / self.cellSize)))
+        return (r0, r1, c0, c1)
+
+    def clampOrigin(self):
+        board = self.gameState.game.board
+        self.originRow = min(max(self.originRow, 0), max(board.row - self.height / self.cellSize, 0))
+        self.originCol = min(max(self.originCol, 0), max(board.col - self.width / self.cellSize, 0))
+
+    def zoom(self, factor, x, y):
+        """Scale the view by factor, keeping the board position under canvas point x, y still."""
+        board = self.gameState.game.board
+        row = self.originRow + y / self.cellSize
+        col = self.originCol + x / self.cellSize
+        smallest = min(self.width / board.col, self.height / board.row)
+        self.cellSize = min(max(self.cellSize * factor, smallest), max(self.MAX_CELL, smallest))
+        self.originRow = row - y / self.cellSize
+        self.originCol = col - x / self.cellSize
+        self.clampOrigin()
+        self.full_render()
+
+    def pan(self, dx, dy):
+        """Move the board by dx, dy canvas pixels."""
+        self.originCol -= dx / self.cellSize
+        self.originRow -= dy / self.cellSize
+        self.clampOrigin()
+        self.full_render()
+
+    def enemyColour(self, r, c):
+        en = self.gameState.game.board.enemyAt(r, c)
+        return self.ENEMY_COLS[en.tactic] if en else self.COLOURS[-3]
+
+    def full_render(self):
+        board = self.gameState.game.board
+        if self.fitted != (board.row, board.col):
+            self.fit()
+        self.canvas.delete("all")
+        self.cells = {}
+        self.objects = {}
+        self.enemies = {}
+        self.drawn = {}
+        self.image = None
+        self.enemyCells = set()
+        self.trailItems = []
+        self.trailFirst = self.trail.first
+        self.heatItems = {}
+        self.trail.markAllDirty()
+        self.enemyCells.update(board.enemies)
+        if self.isRaster():
+            self.drawRaster()
+        else:
+            (r0, r1, c0, c1) = self.visibleRange()
+            size = self.cellSize
+            for i in range(r0, r1):
+                line = board.rowView(i)
+                for j in range(c0, c1):
+                    (x, y) = self.toScreen(i, j)
+                    self.cells[(i, j)] = self.canvas.create_rectangle(x, y, x + size, y + size,
+                                                                      fill=self.COLOURS[line[j]])
+                    self.drawCell(i, j)
+        self.robot = None
+        self.drawTrail()
+        self.drawRobot()
+
+    def partial_render(self):
+        dirty = set(self.enemyCells)
+        for (r, c, discard) in self.gameState.moveList[max(self.drawnMoves - 1, 0):]:
+            dirty.add((r, c))
+        dirty.update(self.gameState.game.board.enemies)
+        for (r, c) in dirty:
+            self.drawCell(r, c)
+        self.drawTrail()
+        self.drawRobot()
+
+    def refreshCell(self, row, col):
+        self.drawCell(row, col)
+
+    def rasterColour(self, value, enemy):
+        if value == 4:
+            return self.COLOURS[-2]
+        return enemy or self.COLOURS[value]
+
+    def drawRaster(self):
+        # One pixel per screen column, sampling whichever cell lies under it. Screen rows covering the same board
+        # row share one put, which Tk tiles over the whole band.
+        board = self.gameState.game.board
+        width = min(self.width, int(math.ceil((board.col - self.originCol) * self.cellSize)))
+        height = min(self.height, int(math.ceil((board.row - self.originRow) * self.cellSize)))
+        self.image = self.PhotoImage(width=width, height=height)
+        columns = [min(int(self.originCol + x / self.cellSize), board.col - 1) for x in range(width)]
+        y = 0
+        while y < height:
+            r = min(int(self.originRow + y / self.cellSize), board.row - 1)
+            end = y + 1
+            while end < height and int(self.originRow + end / self.cellSize) == r:
+                end += 1
+            pixels = []
+            line = board.rowView(r)
+            for c in columns:
+                value = line[c]
+                pixels.append(self.rasterColour(value, self.enemyColour(r, c) if value == 5 else None))
+            self.image.put("{" + " ".join(pixels) + "}", to=(0, y, width, end))
+            y = end
+        self.canvas.create_image(0, 0, image=self.image, anchor=tk.NW, tag="board")
+
+    def drawCell(self, r, c):
+        value = self.gameState.game.board.scanSpace(r, c)
+        enemy = None
+        if value == 5:
+            enemy = self.enemyColour(r, c)
+            self.enemyCells.add((r, c))
+        else:
+            self.enemyCells.discard((r, c))
+        if self.drawn.get((r, c)) == (value, enemy):
+            return
+        (x, y) = self.toScreen(r, c)
+        size = self.cellSize
+        if self.isRaster():
+            if self.image is not None and 0 <= x < self.image.width() and 0 <= y < self.image.height():
+                self.drawn[(r, c)] = (value, enemy)
+                self.image.put(self.rasterColour(value, enemy),
+                               to=(int(x), int(y), max(int(x + size), int(x) + 1), max(int(y + size), int(y) + 1)))
+            return
+        if (r, c) not in self.cells:
+            return  # Outside the viewport
+        self.drawn[(r, c)] = (value, enemy)
+        self.canvas.itemconfig(self.cells[(r, c)], fill=self.COLOURS[value])
+        if value == 4 and (r, c) not in self.objects:
+            self.objects[(r, c)] = self.canvas.create_rectangle(x + size / 4, y + size / 4, x + 3 * size / 4,
+                                                                y + 3 * size / 4, fill=self.COLOURS[-2], tag="object")
+        elif (r, c) in self.objects:
+            self.canvas.itemconfig(self.objects[(r, c)], state=tk.NORMAL if value == 4 else tk.HIDDEN)
+        if enemy and (r, c) not in self.enemies:
+            self.enemies[(r, c)] = self.canvas.create_oval(x, y, x + size, y + size, fill=enemy, tag="enemy")
+        elif (r, c) in self.enemies:
+            self.canvas.itemconfig(self.enemies[(r, c)], fill=enemy or "", state=tk.NORMAL if enemy else tk.HIDDEN)
+
+    def setTrailMode(self, mode):
+        self.trailMode = mode
+        self.full_render()
+
+    def drawTrail(self):
+        if self.trail.source is not self.gameState.moveList:
+            # The game was reset, so start following the new run
+            self.trail = Trail(self.gameState.moveList)
+            self.canvas.delete("trail")
+            self.trailItems = []
+            self.trailFirst = 0
+            self.heatItems = {}
+        trail = self.trail
+        trail.update()
+        self.drawnMoves = len(self.gameState.moveList)
+        if self.trailMode == "Lines":
+            self.drawTrailLines()
+        elif self.trailMode == "Heatmap" and not self.isRaster():
+            self.drawHeatmap()
+        trail.clearChanges()
+
+    def drawTrailLines(self):
+        trail = self.trail
+        while self.trailFirst < trail.first:
+            if self.trailItems:
+                self.canvas.delete(self.trailItems.pop(0))
+            self.trailFirst += 1
+        if trail.dirtyRun is not None:
+            for n in range(max(trail.dirtyRun, trail.first), trail.first + len(trail.runs)):
+                coords = []
+                for (r, c) in trail.runs[n - trail.first]:
+                    coords.extend(self.toScreen(r + 0.5, c + 0.5))
+                if len(coords) == 2:
+                    coords = coords * 2
+                local = n - self.trailFirst
+                if local < len(self.trailItems):
+                    self.canvas.coords(self.trailItems[local], *coords)
+                else:
+                    self.trailItems.append(self.canvas.create_line(*coords, tag="trail"))
+        half = self.cellSize / 2
+        for (r, c, direction) in trail.newBumps:
+            if direction not in self.BUMP:
+                continue
+            (x, y) = self.toScreen(r + 0.5, c + 0.5)
+            (dr, dc) = self.BUMP[direction]
+            self.canvas.create_line(x, y, x + dc * half, y + dr * half, tag="trail")
+
+    def drawHeatmap(self):
+        size = self.cellSize
+        for cell in self.trail.changedVisits:
+            if cell not in self.cells:
+                continue  # Outside the viewport
+            count = self.trail.visits[cell]
+            fill = self.HEAT_COLS[min(count.bit_length() - 1, len(self.HEAT_COLS) - 1)]
+            if cell in self.heatItems:
+                self.canvas.itemconfig(self.heatItems[cell], fill=fill)
+            else:
+                (x, y) = self.toScreen(cell[0], cell[1])
+                self.heatItems[cell] = self.canvas.create_rectangle(x, y, x + size, y + size, fill=fill, outline="",
+                                                                    stipple="gray50", tag="trail")
+
+    def drawRobot(self):
+        # Never draw the robot smaller than a few pixels, or it vanishes when zoomed out
+        size = max(self.cellSize, 4)
+        (rCol, rRow) = self.toScreen(self.gameState.game.currentRow + 0.5, self.gameState.game.currentCol + 0.5)
+        rCol -= size / 2
+        rRow -= size / 2
+        if self.robot is None:
+            self.robot = self.canvas.create_oval(rCol, rRow, rCol + size, rRow + size, fill=self.COLOURS[-1],
+                                                 tag="robot")
+            self.carried = self.canvas.create_rectangle(rCol + size / 4, rRow + size / 4, rCol + 3 * size / 4,
+                                                        rRow + 3 * size / 4, fill=self.COLOURS[-2], tag="robot")
+        else:
+            self.canvas.coords(self.robot, rCol, rRow, rCol + size, rRow + size)
+            self.canvas.coords(self.carried, rCol + size / 4, rRow + size / 4, rCol + 3 * size / 4,
+                               rRow + 3 * size / 4)
+            self.canvas.tag_raise("robot")
+        self.canvas.itemconfig(self.carried, state=tk.NORMAL if self.gameState.game.robotCarrying() else tk.HIDDEN)
+
+
+class MazeApp(tk.Frame):
+    METRICS_REFRESH = 0.5  # seconds between updates of the timings panel
+    STEPS_PER_FRAME = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+    IDLE_POLL = 50  # ms between polls of the engine while nothing is playing, to keep a live view server going
+    UNTIL = ("STOP", "Step", "Collision")
+
+    def __init__(self, master, game, *args, engine=None, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.gameState = game
+        self.liveState = game  # the robot's own game, kept while a replay is shown
         self.collisions = tk.IntVar(self, value=0)
         self.attacks = tk.IntVar(self, value=0)
         self.steps = tk.IntVar(self, value=0)
         self.objectsRet = tk.IntVar(self, value=0)
         self.objectsTot = tk.IntVar(self, value=game.game.numberOfObjs())
-        self.timer = None
+        self.engine = Engine() if engine is None else engine
+        self.engine.subscribe(self.onStep)
+        self.timer = None  # polls the engine and draws, whenever it is playing the shown game
+        self.dirty = False
+        self.fast = False
+        self.server = None
+        self.renderTime = 0
         self.width = 800
         self.height = 800
-        self.unsaved = False
         lPanel = tk.Frame(self)
         self.canvas = tk.Canvas(lPanel, width=800, height=800, bg="white")
         self.canvas.pack(anchor=tk.CENTER)
+        self.view = BoardView(self.canvas, game, self.width, self.height)
         lPanel.pack(side=tk.LEFT)
         rPanel = tk.Frame(self)
         tk.Label(rPanel, text="Steps:", font='-weight bold -size 12').pack(side=tk.TOP)
@@ -147,6 +610,12 @@ class MazeApp(tk.Frame):
         tk.Label(rtGrp, text="out of", font='-weight bold -size 12').pack(side=tk.LEFT, padx=2)
         tk.Label(rtGrp, textvariable=self.objectsTot, font='-weight bold -size 12').pack(side=tk.LEFT, padx=2)
         rtGrp.pack(side=tk.TOP)
+        tk.Label(rPanel, text="Step timings (ms p50 / p95 / max):").pack(side=tk.TOP)
+        self.timings = {}
+        self.metricsShown = 0
+        for phase in StepMetrics.PHASES:
+            self.timings[phase] = tk.StringVar(self, value=phase + ": -")
+            tk.Label(rPanel, textvariable=self.timings[phase], font='TkFixedFont').pack(side=tk.TOP)
         tk.Label(rPanel, text="").pack(side=tk.TOP)
 
         tk.Button(rPanel, text="Step", command=self.step).pack(side=tk.TOP)
@@ -154,6 +623,10 @@ class MazeApp(tk.Frame):
         tk.Button(rPanel, text="Pause", command=self.pause).pack(side=tk.TOP)
         tk.Button(rPanel, text="Restart", command=self.restart).pack(side=tk.TOP)
         tk.Button(rPanel, text="Render", command=self.full_render).pack(side=tk.TOP)
+        tk.Button(rPanel, text="Zoom to Fit", command=self.zoomFit).pack(side=tk.TOP)
+        self.trailVar = tk.StringVar(self, value=self.view.trailMode)
+        tk.Label(rPanel, text="Trail:").pack(side=tk.TOP)
+        tk.OptionMenu(rPanel, self.trailVar, *BoardView.TRAIL_MODES, command=self.view.setTrailMode).pack(side=tk.TOP)
         tk.Button(rPanel, text="ConsolePrint", command=self)
         tk.Label(rPanel, text="").pack(side=tk.TOP)
 
@@ -166,43 +639,82 @@ class MazeApp(tk.Frame):
         tk.Button(rPanel, text="Load Board", command=self.load).pack(side=tk.TOP)
         tk.Button(rPanel, text="Save Board", command=self.save).pack(side=tk.TOP)
         tk.Button(rPanel, text="Generate Board", command=self.gen).pack(side=tk.TOP)
+        tk.Button(rPanel, text="Save Run", command=self.saveRun).pack(side=tk.TOP)
+        self.position = tk.IntVar(self, 0)
+        self.positionScale = tk.Scale(rPanel, label="Position", from_=0, to=0, length=300,
+                                      variable=self.position, orient=tk.HORIZONTAL, command=self.seek)
+        self.positionScale.pack(side=tk.TOP)
         tk.Label(rPanel, text="").pack(side=tk.TOP)
 
         self.rate = tk.IntVar(self, 1000)
         tk.Label(rPanel, text="Update Speed").pack(side=tk.TOP)
         tk.Scale(rPanel, from_=1, to=1000, resolution=10, tick=100, length=300, variable=self.rate,
                  orient=tk.HORIZONTAL).pack(side=tk.TOP)
+        self.stepsPerFrame = tk.IntVar(self, 1)
+        tk.Label(rPanel, text="Steps per frame").pack(side=tk.TOP)
+        tk.Spinbox(rPanel, values=self.STEPS_PER_FRAME, textvariable=self.stepsPerFrame, width=6).pack(side=tk.TOP)
+        self.rate.trace_add("write", self.changeSpeed)
+        self.stepsPerFrame.trace_add("write", self.changeSpeed)
+        self.fps = tk.IntVar(self, 30)
+        tk.Label(rPanel, text="Frames per second").pack(side=tk.TOP)
+        tk.Scale(rPanel, from_=1, to=60, length=300, variable=self.fps, orient=tk.HORIZONTAL).pack(side=tk.TOP)
+        ffGrp = tk.Frame(rPanel)
+        tk.Button(ffGrp, text="Fast Forward", command=self.fastForward).pack(side=tk.LEFT)
+        tk.Label(ffGrp, text="until").pack(side=tk.LEFT)
+        self.untilVar = tk.StringVar(self, "STOP")
+        tk.OptionMenu(ffGrp, self.untilVar, *self.UNTIL).pack(side=tk.LEFT)
+        self.untilStep = tk.IntVar(self, 1000)
+        tk.Entry(ffGrp, textvariable=self.untilStep, width=7).pack(side=tk.LEFT)
+        ffGrp.pack(side=tk.TOP)
         rPanel.pack(side=tk.RIGHT)
         self.pack()
         self.full_render()
         self.canvas.bind("<Button-1>", self.lClick)
         self.canvas.bind("<Button-3>", self.rClick)
+        # Zoom with the mouse wheel (X11 reports it as buttons 4 and 5) and pan by dragging with the middle button
+        self.canvas.bind("<MouseWheel>", lambda e: self.view.zoom(1.25 if e.delta > 0 else 0.8, e.x, e.y))
+        self.canvas.bind("<Button-4>", lambda e: self.view.zoom(1.25, e.x, e.y))
+        self.canvas.bind("<Button-5>", lambda e: self.view.zoom(0.8, e.x, e.y))
+        self.canvas.bind("<Button-2>", self.startPan)
+        self.canvas.bind("<B2-Motion>", self.dragPan)
+        self.panFrom = None
+
+    def startPan(self, event):
+        self.panFrom = (event.x, event.y)
+
+    def dragPan(self, event):
+        if self.panFrom is None:
+            return
+        self.view.pan(event.x - self.panFrom[0], event.y - self.panFrom[1])
+        self.panFrom = (event.x, event.y)
+
+    def zoomFit(self):
+        self.view.fit()
+        self.full_render()
 
     def lClick(self, event):
-        if self.timer:
+        if self.engine.running(self.gameState) or isinstance(self.gameState, ReplayState):
             return
-        self.unsaved = True
-        (rowSize, colSize) = self.getGridSize()
-        row = event.y // rowSize
-        col = event.x // colSize
-        print(row, col)
+        cell = self.view.cellAt(event.x, event.y)
+        if cell is None:
+            return
+        (row, col) = cell
         p = self.gameState.game.board.scanSpace(row, col)
-        print(p)
         if p == 1:
-            self.gameState.game.board.updateSpace(row, col, 0)
+            self.gameState.editSquare(0, row, col)
         if p == 0:
-            self.gameState.game.board.updateSpace(row, col, 1)
+            self.gameState.editSquare(1, row, col)
 
-        self.full_render()
+        self.view.refreshCell(row, col)
 
     def rClick(self, event):
-        if self.timer:
+        if self.engine.running(self.gameState) or isinstance(self.gameState, ReplayState):
+            return
+        cell = self.view.cellAt(event.x, event.y)
+        if cell is None:
             return
-        self.unsaved = True
-        (rowSize, colSize) = self.getGridSize()
-        row = event.y // rowSize
-        col = event.x // colSize
-        popup = tk.Menu(ROOT, tearoff=0)
+        (row, col) = cell
+        popup = tk.Menu(self, tearoff=0)
         popup.add_command(label="Empty", command=lambda: self.changeSquare(0, row, col))
         popup.add_command(label="Wall", command=lambda: self.changeSquare(1, row, col))
         popup.add_command(label="Goal", command=lambda: self.changeSquare(2, row, col))
@@ -214,46 +726,20 @@ class MazeApp(tk.Frame):
             popup.grab_release()
 
     def changeSquare(self, target, row, col):
-        # So many special cases...
-        old = self.gameState.game.board.scanSpace(row, col)
-        if old == 3 or old == 5:
-            return  # Must always have a start square so no overwriting, and overwriting enemies is not supported
-        if old == 2:
-            if self.gameState.game.getGoal() == [row, col]:
-                for i in range(self.gameState.game.rows):
-                    for j in range(self.gameState.game.cols):
-                        if not (i == row and j == col):
-                            if self.gameState.game.board.scanSpace(i, j) == 2:
-                                self.gameState.game.board.goal = [i, j]
-            if self.gameState.game.getGoal() == [row, col]:
-                # No alternative found, so don't allow replacing final goal
-                return
-        if old == 4:
-            # Update the game data for the new number of objects
-            self.gameState.game.totalItems = self.gameState.game.totalItems - 1
-            self.gameState.game.board.totalItems = self.gameState.game.board.totalItems - 1
-        if target == 2:
-            self.gameState.game.board.goal = [row, col]  # Use newest goal as target
-        if target == 3:
-            oldStart = self.gameState.game.getStart()
-            self.gameState.game.board.updateSpace(oldStart[0], oldStart[1], 0)  # Revert old start to empty
-            self.gameState.game.board.start = [row, col]  # Replace start with new start
-            if self.gameState.game.getCurrentLocation() == oldStart:  # If robot is sitting at start
-                self.gameState.game.currentCol = col  # Move robot to new start
-                self.gameState.game.currentRow = row
-                self.gameState.moveList = [(row, col, "")]
-        if target == 4:
-            # Update the game data for the new number of objects
-            self.gameState.game.totalItems = self.gameState.game.totalItems + 1
-            self.gameState.game.board.totalItems = self.gameState.game.board.totalItems + 1
-
-        self.gameState.game.board.updateSpace(row, col, target)
-        self.full_render()
+        if self.gameState.editSquare(target, row, col):
+            self.full_render()
 
     def changeGamemode(self, *args):
         var = self.gamemodeVar.get()
-        self.gameState.gameArgs['gameType'] = var
-        self.restart()
+        if var == self.gameState.game.gameType:
+            return
+        if isinstance(self.gameState, ReplayState):
+            # Leave the replay for the live game, played in the chosen game type
+            self.liveState.setGameType(var)
+            self.setGameState(self.liveState)
+            return
+        self.gameState.setGameType(var)
+        self.full_render()
 
     def getRate(self):
         r = self.rate.get()
@@ -261,306 +747,3100 @@ class MazeApp(tk.Frame):
             r = 0
         return r
 
+    def getStepsPerFrame(self):
+        try:
+            return max(self.stepsPerFrame.get(), 1)
+        except tk.TclError:
+            return 1  # Still being typed
+
+    def untilCondition(self):
+        """A test of the game state for the point where fast forward should stop, or None to run until STOP."""
+        until = self.untilVar.get()
+        if until == "Step":
+            try:
+                target = self.untilStep.get()
+            except tk.TclError:
+                return None
+            return lambda state: state.game.movesMade >= target
+        if until == "Collision":
+            return lambda state: state.moveList.eventsAt(len(state.moveList) - 1) & (RunLog.COLLISION |
+                                                                                    RunLog.ATTACK)
+        return None
+
     def load(self):
         self.pause()
         newFile = tkf.askopenfilename(parent=self, initialdir=os.path.join(PATH, 'exampleMazes'),
                                       title="Select Maze",
-                                      filetypes=(("Maze Files", "*.maze"), ("Maze Files", "*.txt")))
-        self.gameState.gameArgs = {'gameType': self.gameState.gameArgs['gameType'], 'file': newFile}
-        self.reset()
+                                      filetypes=MAZE_FILETYPES + (("Replay Files", "*.run"),))
+        if not newFile:
+            return
+        if newFile.endswith(".run"):
+            try:
+                self.setGameState(ReplayState(newFile))
+            except LOAD_ERRORS as e:
+                tkmb.showerror("Cannot load replay", "%s could not be read: %s" % (newFile, e), parent=self)
+            return
+        self.setGameState(self.liveState)
+        gameArgs = self.gameState.gameArgs
+        self.gameState.gameArgs = {'gameType': gameArgs['gameType'], 'file': newFile}
+        try:
+            self.reset()
+        except LOAD_ERRORS as e:
+            tkmb.showerror("Cannot load maze", "%s could not be read: %s" % (newFile, e), parent=self)
+            self.gameState.gameArgs = gameArgs
+            self.reset()
+
+    def saveRun(self):
+        self.pause()
+        saveFile = tkf.asksaveasfilename(parent=self, initialdir=os.path.join(PATH, 'exampleMazes'),
+                                         title="Save Run", filetypes=(("Replay Files", "*.run"),),
+                                         defaultextension=".run")
+        if saveFile:
+            self.gameState.saveRun(saveFile)
+
+    def setGameState(self, state):
+        """Show a different game, such as a replay, in place of the current one."""
+        self.pause()
+        if state is not self.gameState and self.gameState is not self.liveState:
+            self.gameState.close()
+        self.gameState = state
+        self.view.gameState = state
+        self.view.fitted = None
+        if self.gamemodeVar.get() != state.game.gameType:
+            self.gamemodeVar.set(state.game.gameType)
+        self.full_render()
+
+    def seek(self, value):
+        if int(value) == len(self.gameState.moveList) - 1:
+            return
+        self.pause()
+        if isinstance(self.gameState, ReplayState):
+            self.gameState.seek(int(value))
+        else:
+            self.gameState.rewind(int(value))
+        self.full_render()
 
     def save(self):
         self.pause()
         saveFile = tkf.asksaveasfilename(parent=self, initialdir=os.path.join(PATH, 'exampleMazes'),
                                          title="Save Maze",
-                                         filetypes=(("Maze Files", "*.maze"), ("Maze Files", "*.txt")),
-                                         defaultextension=".maze")
-        self.gameState.game.board.writeBoard(saveFile)
+                                         filetypes=MAZE_FILETYPES, defaultextension=".maze")
+        if not saveFile:
+            return
+        if isBinaryMaze(saveFile):
+            writeMaze(gridFromGame(self.gameState.game), saveFile)
+        else:
+            self.gameState.game.board.writeBoard(saveFile)
 
     def gen(self):
         self.pause()
+        if self.gameState is not self.liveState:
+            self.setGameState(self.liveState)
         dialogBox = GenerateDialog(self)
         result = self.gameState.gameArgs
         if dialogBox.result:
             result = dialogBox.result
             result['gameType'] = self.gameState.gameArgs['gameType']
-            result['file'] = ""
-            result['eTups'] = list()
+            if 'generator' not in result:
+                result['file'] = ""
+                result['eTups'] = list()
         self.gameState.gameArgs = result
         self.reset()
 
+    def play(self, **kwargs):
+        """Have the engine play the shown game, as Engine.play(gameState, **kwargs), and draw it as it goes."""
+        self.engine.start(self.gameState, **kwargs)
+        if self.timer is None:
+            self.timer = self.after(1, self.on_time)
+
     def start(self):
         self.gameState.done = False
-        self.timer = self.after(self.getRate(), self.on_time)
+        self.fast = False
+        self.play(delay=self.getRate() / 1000, batch=self.getStepsPerFrame())
+
+    def changeSpeed(self, *args):
+        if self.engine.running(self.gameState) and not self.fast:
+            self.start()
+
+    def fastForward(self):
+        """Run as fast as the robot allows until the chosen point is reached."""
+        if self.gameState.done:
+            return
+        self.fast = True
+        self.play(until=self.untilCondition())
 
     def pause(self):
+        self.engine.stop(self.gameState)
         if self.timer:
             self.after_cancel(self.timer)
         self.timer = None
 
     def restart(self):
         self.pause()
-        if self.unsaved:
-            self.gameState.restart()
-        else:
-            self.gameState.reset()
-        self.canvas.delete("all")
+        self.gameState.restart()
         self.full_render()
 
     def reset(self):
         self.pause()
         self.gameState.reset()
-        self.canvas.delete("all")
         self.full_render()
 
     def on_time(self):
-        self.step()
-        if not self.gameState.done:
-            self.timer = self.after(self.getRate(), self.on_time)
+        # Give the engine most of a frame, leaving enough time to draw whatever it did
+        start = time.perf_counter()
+        frame = 1.0 / max(self.fps.get(), 1)
+        self.engine.poll(max(frame - self.renderTime, frame / 4))
+        if self.dirty:
+            self.dirty = False
+            self.partial_render()
+        if self.engine.running(self.gameState):
+            self.timer = self.after(max(int((start + frame - time.perf_counter()) * 1000), 1), self.on_time)
+        else:
+            self.timer = None
 
-    def step(self):
-        if self.unsaved:
-            self.unsaved = False
-            self.gameState.tempSave()
-        self.gameState.nextAction()
-        self.partial_render()
+    def onStep(self, event):
+        if event.state is self.gameState:
+            self.dirty = True
 
-    def getGridSize(self):
-        col = self.width // self.gameState.game.board.col
-        row = self.height // self.gameState.game.board.row
-        return (row, col)
+    def serve(self, port):
+        """Also show the game in a browser, served on localhost port."""
+        self.server = LiveServer(self.engine, port)
+        self.server.watch(self.liveState)
+        print("Watch the game at http://127.0.0.1:%d/" % self.server.port)
+        self.after(self.IDLE_POLL, self.idle)
 
-    def full_render(self):
-        # Update counters
+    def idle(self):
+        if self.timer is None:
+            self.engine.poll()
+        self.after(self.IDLE_POLL, self.idle)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.engine.close()
+        if self.gameState is not self.liveState:
+            self.gameState.close()  # The replay being shown, with its temporary maze file
+
+    def step(self):
+        if self.engine.running(self.gameState) or self.gameState.done:
+            return
+        self.play(moves=1)
+
+    def updateCounters(self):
         self.collisions.set(self.gameState.game.collisions)
         self.steps.set(self.gameState.game.movesMade)
+        self.attacks.set(self.gameState.game.enemyCollisions)
         self.objectsTot.set(self.gameState.game.numberOfObjs())
         self.objectsRet.set(self.gameState.game.itemsRetrieved)
-        # Redraw maze grid
-        (row, col) = self.getGridSize()
-        colx = 0
-
-        # render board colours
-        for i in self.gameState.game.board.room:
-            colx = colx + col
-            rowx = 0
-            for j in i:
-                rowx += row
-                self.canvas.create_rectangle(rowx, colx, rowx - row, colx - col, fill=self.COLOURS[j.scanSpace()])
-                if j.scanSpace() == 4:
-                    self.canvas.create_rectangle(rowx - row / 4, colx - col / 4, rowx - 3 * row / 4, colx - 3 * col /
-                                                 4, fill=self.COLOURS[-2], tag="object")
-                if j.scanSpace() == 5:
-                    f = False
-                    for en in self.gameState.game.enemyList:
-
-                        if en.currRow==(colx//col)-1 and en.currCol==(rowx//row)-1:
-                            f = True
-                            self.canvas.create_oval(rowx, colx, rowx - row, colx - col,
-                                                    fill=self.ENEMY_COLS[en.tactic],
-                                                    tag="enemy")
-                    if not f:
-                        self.canvas.create_oval(rowx, colx, rowx - row, colx - col,
-                                                fill=self.COLOURS[-3],
-                                                tag="enemy")
-
-        # Render path taken
-        lastR, lastC, discard = self.gameState.moveList[0]
-        lastX = lastC * col + col // 2
-        lastY = lastR * row + row // 2
-        for i in self.gameState.moveList:
-            nextX = i[1] * col + col // 2
-            nextY = i[0] * row + row // 2
-            if (nextX, nextY) == (lastX, lastY):
-                # Collided with wall or wait
-                if i[2] == "EAST":
-                    self.canvas.create_line(lastX, lastY, nextX + (col // 2), nextY, tag="trail")
-                elif i[2] == "WEST":
-                    self.canvas.create_line(lastX, lastY, nextX - (col // 2), nextY, tag="trail")
-                elif i[2] == "SOUTH":
-                    self.canvas.create_line(lastX, lastY, nextX, nextY + (col // 2), tag="trail")
-                elif i[2] == "NORTH":
-                    self.canvas.create_line(lastX, lastY, nextX, nextY - (col // 2), tag="trail")
+        if isinstance(self.gameState, ReplayState):
+            self.positionScale.configure(to=len(self.gameState.record) - 1)
+        else:
+            self.positionScale.configure(to=len(self.gameState.moveList) - 1)
+        self.position.set(len(self.gameState.moveList) - 1)
+
+    def full_render(self):
+        self.updateCounters()
+        self.view.full_render()
+
+    def partial_render(self):
+        start = time.perf_counter()
+        self.updateCounters()
+        self.view.partial_render()
+        self.renderTime = time.perf_counter() - start
+        self.gameState.metrics.record("render", self.renderTime)
+        if start - self.metricsShown > self.METRICS_REFRESH:
+            self.showMetrics()
+            self.metricsShown = start
+
+    def showMetrics(self):
+        for row in self.gameState.metrics.summary():
+            self.timings[row["phase"]].set("%s: %.2f / %.2f / %.2f" % (row["phase"], row["p50"], row["p95"],
+                                                                       row["max"]))
+
+
+class TournamentApp(tk.Frame):
+    """Several robots on copies of one maze, each drawn on its own small board, with a leaderboard.
+
+    The engine plays the games in lockstep, one move each per round, so whenever the boards are drawn every robot
+    has had the same number of turns. Only the boards that changed since the last frame are redrawn, and boards
+    this small are mostly drawn as a single image, so a dozen robots cost little more to show than one."""
+    BOARD = 880  # pixels across the whole grid of boards
+    MIN_BOARD = 120  # smallest board, in pixels, however many robots there are
+    ROW = "%-3s %-20s %6s %6s %6s %9s  %s"
+
+    def __init__(self, master, states, names, *args, engine=None, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.states = list(states)
+        self.names = list(names)
+        self.engine = Engine() if engine is None else engine
+        self.engine.subscribe(self.onStep)
+        self.timer = None
+        self.dirty = set()  # indices of the states that moved since their board was drawn
+        self.renderTime = 0
+        across = int(math.ceil(math.sqrt(len(self.states))))
+        size = max(self.BOARD // across, self.MIN_BOARD)
+        grid = tk.Frame(self)
+        self.views = []
+        for (i, state) in enumerate(self.states):
+            cell = tk.Frame(grid)
+            tk.Label(cell, text="%d. %s" % (i + 1, self.names[i])).pack(side=tk.TOP)
+            canvas = tk.Canvas(cell, width=size, height=size, bg="white")
+            canvas.pack(side=tk.TOP)
+            cell.grid(row=i // across, column=i % across, padx=2, pady=2)
+            self.views.append(BoardView(canvas, state, size, size))
+        grid.pack(side=tk.LEFT)
+        rPanel = tk.Frame(self)
+        tk.Label(rPanel, text="Leaderboard:", font='-weight bold -size 12').pack(side=tk.TOP)
+        self.leaderboard = tk.StringVar(self)
+        tk.Label(rPanel, textvariable=self.leaderboard, font='TkFixedFont', justify=tk.LEFT).pack(side=tk.TOP)
+        tk.Label(rPanel, text="").pack(side=tk.TOP)
+
+        tk.Button(rPanel, text="Step", command=self.step).pack(side=tk.TOP)
+        tk.Button(rPanel, text="Start", command=self.start).pack(side=tk.TOP)
+        tk.Button(rPanel, text="Pause", command=self.pause).pack(side=tk.TOP)
+        tk.Button(rPanel, text="Restart", command=self.restart).pack(side=tk.TOP)
+        tk.Label(rPanel, text="").pack(side=tk.TOP)
+
+        self.rate = tk.IntVar(self, 100)
+        tk.Label(rPanel, text="Update Speed (0 for as fast as possible)").pack(side=tk.TOP)
+        tk.Scale(rPanel, from_=0, to=1000, resolution=10, tick=100, length=300, variable=self.rate,
+                 orient=tk.HORIZONTAL).pack(side=tk.TOP)
+        self.rate.trace_add("write", self.changeSpeed)
+        self.fps = tk.IntVar(self, 30)
+        tk.Label(rPanel, text="Frames per second").pack(side=tk.TOP)
+        tk.Scale(rPanel, from_=1, to=60, length=300, variable=self.fps, orient=tk.HORIZONTAL).pack(side=tk.TOP)
+        rPanel.pack(side=tk.RIGHT)
+        self.pack()
+        self.full_render()
+
+    def key(self):
+        return tuple(self.states)
+
+    def play(self, **kwargs):
+        """Have the engine play every game, as Engine.lockstep(states, **kwargs), and draw them as it goes."""
+        self.engine.startLockstep(self.states, **kwargs)
+        if self.timer is None:
+            self.timer = self.after(1, self.on_time)
+
+    def start(self):
+        try:
+            delay = max(self.rate.get(), 0) / 1000
+        except tk.TclError:
+            delay = 0
+        self.play(delay=delay)
+
+    def changeSpeed(self, *args):
+        if self.engine.running(self.key()):
+            self.start()
+
+    def step(self):
+        if self.engine.running(self.key()):
+            return
+        self.play(rounds=1)
+
+    def pause(self):
+        self.engine.stop(self.key())
+        if self.timer:
+            self.after_cancel(self.timer)
+        self.timer = None
+
+    def restart(self):
+        self.pause()
+        for state in self.states:
+            state.restart()
+        self.full_render()
+
+    def close(self):
+        self.engine.close()
+
+    def on_time(self):
+        start = time.perf_counter()
+        frame = 1.0 / max(self.fps.get(), 1)
+        self.engine.poll(max(frame - self.renderTime, frame / 4))
+        if self.dirty:
+            self.partial_render()
+        if self.engine.running(self.key()):
+            self.timer = self.after(max(int((start + frame - time.perf_counter()) * 1000), 1), self.on_time)
+        else:
+            self.timer = None
+
+    def onStep(self, event):
+        try:
+            self.dirty.add(self.states.index(event.state))
+        except ValueError:
+            pass  # A game this app is not showing
+
+    def standings(self):
+        """(rank, name, state) for every robot, best first: those that succeeded, then by items retrieved, moves
+        made and collisions of either kind."""
+        order = sorted(range(len(self.states)), key=lambda i: (not self.states[i].success,
+                                                                -self.states[i].game.itemsRetrieved,
+                                                                self.states[i].game.movesMade,
+                                                                self.states[i].game.collisions +
+                                                                self.states[i].game.enemyCollisions))
+        return [(rank + 1, self.names[i], self.states[i]) for (rank, i) in enumerate(order)]
+
+    def showLeaderboard(self):
+        lines = [self.ROW % ("", "Robot", "Steps", "Coll", "Attack", "Retrieved", "Result")]
+        for (rank, name, state) in self.standings():
+            game = state.game
+            if state.success:
+                result = "success"
+            elif state.done:
+                result = state.failure or "stopped"
             else:
-                self.canvas.create_line(lastX, lastY, nextX, nextY, tag="trail")
-            lastX = nextX
-            lastY = nextY
-        # Render robot
-        rCol = self.gameState.game.currentCol * col
-        rRow = self.gameState.game.currentRow * row
-        self.canvas.create_oval(rCol, rRow, rCol + col, rRow + row, fill=self.COLOURS[-1], tag="robot")
-        if self.gameState.game.robotCarrying():
-            self.canvas.create_rectangle(rCol + col / 4, rRow + row / 4, rCol + 3 * col / 4, rRow + 3 * row / 4,
-                                         fill=self.COLOURS[-2], tag="robot")
+                result = ""
+            lines.append(self.ROW % (rank, name[:20], game.movesMade, game.collisions, game.enemyCollisions,
+                                     "%d/%d" % (game.itemsRetrieved, game.numberOfObjs()), result))
+        self.leaderboard.set("\n".join(lines))
+
+    def full_render(self):
+        self.dirty = set()
+        for view in self.views:
+            view.full_render()
+        self.showLeaderboard()
 
     def partial_render(self):
-        # Update counters
-        self.collisions.set(self.gameState.game.collisions)
-        self.steps.set(self.gameState.game.movesMade)
-        self.attacks.set(self.gameState.game.enemyCollisions)
-        self.objectsTot.set(self.gameState.game.numberOfObjs())
-        self.objectsRet.set(self.gameState.game.itemsRetrieved)
-        (row, col) = self.getGridSize()
+        start = time.perf_counter()
+        for i in self.dirty:
+            self.views[i].partial_render()
+        self.dirty = set()
+        self.showLeaderboard()
+        self.renderTime = time.perf_counter() - start
+
+
+class RunLog:
+    """Compact record of a run, one entry per robot move.
+
+    Positions are held in typed arrays, directions as a small code and collision, attack and pickup events as
+    bit flags, so a long run costs a few bytes per move rather than a tuple. Indexing gives the same
+    (row, col, direction) tuples as the old moveList. For game type 3 the position of every enemy after each move
+    is also kept so that a replay does not depend on the enemies' random choices."""
+    DIRECTIONS = ["", "NORTH", "SOUTH", "EAST", "WEST", "STOP"]
+    CODES = {d: n for (n, d) in enumerate(DIRECTIONS)}
+    COLLISION = 1
+    ATTACK = 2
+    PICKUP = 4
+    MAGIC = b"CS255RUN"
+    VERSION = 1
+    HEADER = struct.Struct("<8sHBHI")  # magic, version, gameType, enemies, entries
+
+    def __init__(self, nEnemies=0):
+        self.nEnemies = nEnemies
+        self.rows = array.array("H")
+        self.cols = array.array("H")
+        self.dirs = array.array("B")
+        self.events = array.array("B")
+        self.enemies = array.array("H")  # nEnemies (row, col) pairs per entry
+
+    def append(self, row, col, direction, events=0, enemies=()):
+        self.rows.append(row)
+        self.cols.append(col)
+        self.dirs.append(self.CODES[direction])
+        self.events.append(events)
+        if self.nEnemies:
+            for (r, c) in enemies:
+                self.enemies.append(r)
+                self.enemies.append(c)
+
+    def __len__(self):
+        return len(self.dirs)
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(len(self)))]
+        return (self.rows[n], self.cols[n], self.DIRECTIONS[self.dirs[n]])
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+    def eventsAt(self, n):
+        return self.events[n]
+
+    def prefix(self, n):
+        """A copy of the first n entries."""
+        log = RunLog(self.nEnemies)
+        log.rows = self.rows[:n]
+        log.cols = self.cols[:n]
+        log.dirs = self.dirs[:n]
+        log.events = self.events[:n]
+        log.enemies = self.enemies[:n * 2 * self.nEnemies]
+        return log
+
+    def enemiesAt(self, n):
+        base = n * 2 * self.nEnemies
+        pairs = self.enemies[base:base + 2 * self.nEnemies]
+        return [(pairs[i], pairs[i + 1]) for i in range(0, len(pairs), 2)]
+
+    def write(self, path, gameType, robotName, mazeText):
+        """Save the log as a replay file, together with the board the run started from."""
+        name = robotName.encode("utf-8")
+        maze = mazeText.encode("utf-8")
+        body = [struct.pack("<HI", len(name), len(maze)), name, maze]
+        for arr in (self.rows, self.cols, self.dirs, self.events, self.enemies):
+            if sys.byteorder == "big":
+                arr = array.array(arr.typecode, arr)
+                arr.byteswap()
+            body.append(arr.tobytes())
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, gameType, self.nEnemies, len(self)))
+            f.write(zlib.compress(b"".join(body)))
+
+    @classmethod
+    def read(cls, path):
+        """Load a replay file, returning (log, gameType, robotName, mazeText)."""
+        with open(path, "rb") as f:
+            (magic, version, gameType, nEnemies, count) = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError("%s is not a replay file" % path)
+            body = zlib.decompress(f.read())
+        log = cls(nEnemies)
+        (nameLen, mazeLen) = struct.unpack_from("<HI", body)
+        offset = struct.calcsize("<HI")
+        name = body[offset:offset + nameLen].decode("utf-8")
+        offset += nameLen
+        maze = body[offset:offset + mazeLen].decode("utf-8")
+        offset += mazeLen
+        for (arr, n) in ((log.rows, count), (log.cols, count), (log.dirs, count), (log.events, count),
+                         (log.enemies, count * 2 * nEnemies)):
+            size = arr.itemsize * n
+            arr.frombytes(body[offset:offset + size])
+            if sys.byteorder == "big":
+                arr.byteswap()
+            offset += size
+        return (log, gameType, name, maze)
+
+
+class Grid:
+    """A board held as one byte per cell in row-major order, using the same values as Search boards.
+
+    Whole rows and columns can be filled with slice assignments and searched with bytes.find, so generating
+    and checking even very large boards never loops over single cells in Python."""
+
+    def __init__(self, rows, cols, fill=0):
+        self.rows = rows
+        self.cols = cols
+        self.cells = bytearray([fill]) * (rows * cols)
+        self.start = [0, 0]
+        self.goal = [rows - 1, cols - 1]
+        self.objects = []  # [row, col] of every object
+        self.enemies = []  # (row, col, tactic) of every enemy
+
+    def scanSpace(self, row, col):
+        return self.cells[row * self.cols + col]
+
+    def updateSpace(self, row, col, value):
+        self.cells[row * self.cols + col] = value
 
-        if len(self.gameState.moveList) >= 2:
-            (X, Y, discard) = self.gameState.moveList[-2]
+    def fillRow(self, row, c0, c1, value):
+        self.cells[row * self.cols + c0:row * self.cols + c1] = bytes([value]) * (c1 - c0)
+
+    def fillCol(self, col, r0, r1, value):
+        self.cells[r0 * self.cols + col:r1 * self.cols + col:self.cols] = bytes([value]) * (r1 - r0)
+
+
+class PackedBoard:
+    """A Search board whose cells are also held as one byte each in row-major order, laid out like a Grid.
+
+    scanSpace reads the bytes instead of the board's cell objects, and updateSpace writes to both, so writeBoard
+    carries on working with the board underneath. While Search makes its own moves it is handed the board
+    underneath instead (see GameState.searchCall), and the cells it could have changed are copied back after.
+    Renderers, the oracle and robots can read the whole board at once through view(), a read-only memoryview,
+    rather than calling scanSpace per cell.
+    Every other attribute (start, goal, totalItems, room...) is the underlying board's.
+
+    The board also indexes what stands where: objects is the set of (row, col) cells holding an object, kept up to
+    date by every write, and enemies maps (row, col) to the enemies on that cell, kept up to date by moveEnemies.
+    Either can then be looked up in constant time instead of searching the board or the enemy list."""
+    OWN = ("board", "cells", "rows", "cols", "objects", "enemies")
+
+    def __init__(self, board, enemyList=()):
+        object.__setattr__(self, "board", board)
+        object.__setattr__(self, "rows", board.row)
+        object.__setattr__(self, "cols", board.col)
+        object.__setattr__(self, "cells", bytearray(board.scanSpace(r, c)
+                                                    for r in range(board.row) for c in range(board.col)))
+        object.__setattr__(self, "objects", set(tuple(p) for p in self.positions(4)))
+        object.__setattr__(self, "enemies", {})
+        for en in enemyList:
+            self.enemies.setdefault((en.currRow, en.currCol), []).append(en)
+
+    def __getattr__(self, name):
+        if name in PackedBoard.OWN or name.startswith("__"):
+            raise AttributeError(name)  # Not yet set while copying or unpickling
+        return getattr(self.board, name)
+
+    def __setattr__(self, name, value):
+        if name in PackedBoard.OWN:
+            object.__setattr__(self, name, value)
         else:
-            (X, Y) = self.gameState.game.getStart()
-
-        i = self.gameState.moveList[-1]
-        lastX = Y * col + col // 2
-        lastY = X * row + row // 2
-        nextX = i[1] * col + col // 2
-        nextY = i[0] * row + row // 2
-        if (nextX, nextY) == (lastX, lastY):
-            # Collided with wall or wait
-            if i[2] == "EAST":
-                self.canvas.create_line(lastX, lastY, nextX + (col // 2), nextY, tag="trail")
-            elif i[2] == "WEST":
-                self.canvas.create_line(lastX, lastY, nextX - (col // 2), nextY, tag="trail")
-            elif i[2] == "SOUTH":
-                self.canvas.create_line(lastX, lastY, nextX, nextY + (col // 2), tag="trail")
-            elif i[2] == "NORTH":
-                self.canvas.create_line(lastX, lastY, nextX, nextY - (col // 2), tag="trail")
+            setattr(self.board, name, value)
+
+    def scanSpace(self, row, col):
+        return self.cells[row * self.cols + col]
+
+    def updateSpace(self, row, col, value):
+        self.setCell(row, col, value)
+        self.board.updateSpace(row, col, value)
+
+    def setCell(self, row, col, value):
+        self.cells[row * self.cols + col] = value
+        if value == 4:
+            self.objects.add((row, col))
         else:
-            self.canvas.create_line(lastX, lastY, nextX, nextY, tag="trail")
-
-        self.canvas.delete("robot")
-        rCol = self.gameState.game.currentCol * col
-        rRow = self.gameState.game.currentRow * row
-        self.canvas.create_oval(rCol, rRow, rCol + col, rRow + row, fill=self.COLOURS[-1], tag="robot")
-        if self.gameState.game.robotCarrying():
-            self.canvas.create_rectangle(rCol + col / 4, rRow + row / 4, rCol + 3 * col / 4, rRow + 3 * row / 4,
-                                         fill=self.COLOURS[-2], tag="robot")
-
-        self.canvas.delete("enemy")
-        self.canvas.delete("object")
-        colx = 0
-        for i in self.gameState.game.board.room:
-            colx = colx + col
-            rowx = 0
-            for j in i:
-                rowx += row
-                if j.scanSpace() == 4:
-                    self.canvas.create_rectangle(rowx - row / 4, colx - col / 4, rowx - 3 * row / 4, colx - 3 * col /
-                                                 4, fill=self.COLOURS[-2], tag="object")
-                if j.scanSpace() == 5:
-                    f = False
-                    for en in self.gameState.game.enemyList:
-
-                        if en.currRow == (colx // col) - 1 and en.currCol == (rowx // row) - 1:
-                            f = True
-                            self.canvas.create_oval(rowx, colx, rowx - row, colx - col,
-                                                    fill=self.ENEMY_COLS[en.tactic],
-                                                    tag="enemy")
-                    if not f:
-                        self.canvas.create_oval(rowx, colx, rowx - row, colx - col,
-                                                fill=self.COLOURS[-3],
-                                                tag="enemy")
+            self.objects.discard((row, col))
 
+    def enemyAt(self, row, col):
+        """The enemy standing on (row, col), or None. If several share the cell, the last to arrive."""
+        here = self.enemies.get((row, col))
+        return here[-1] if here else None
 
-class GameState:
-    def __init__(self, type, maze, robot):
-        self.robotProto = robot
-        self.done = False
-        self.moveList = []
-        self.gameArgs = {"gameType": type, "file": maze}
-        self.reset()
+    def moveEnemies(self, enemyList, before):
+        """Update the enemy index for enemies that have moved since they stood at the positions in before."""
+        for (en, old) in zip(enemyList, before):
+            new = (en.currRow, en.currCol)
+            if new == old:
+                continue
+            here = self.enemies.get(old)
+            if here and en in here:
+                here.remove(en)
+                if not here:
+                    del self.enemies[old]
+            there = self.enemies.setdefault(new, [])
+            if en not in there:
+                there.append(en)
 
-    def reset(self):
-        self.game = Search.Game(**self.gameArgs)
-        self.robot = self.robotProto()
-        self.moveList = []
-        self.done = False
-        self.moveList.append((self.game.currentRow, self.game.currentCol, ""))
-        print("Starting in Space: " + str([self.game.currentRow, self.game.currentCol]))
+    def view(self):
+        return memoryview(self.cells).toreadonly()
 
-    def restart(self):
-        self.tempSave()
-        self.reset()
+    def rowView(self, row):
+        return self.view()[row * self.cols:(row + 1) * self.cols]
 
-    def tempSave(self):
-        temp = os.path.join(tempfile.gettempdir(), 'cs255_cw2temp.maze')
-        if os.path.exists(temp):
-            os.remove(temp)
-        self.game.board.writeBoard(temp)
-        self.gameArgs = {'gameType': self.gameArgs.get('gameType'), 'file': temp}
+    def positions(self, value):
+        """[row, col] of every cell holding value, in row-major order."""
+        found = []
+        i = self.cells.find(value)
+        while i >= 0:
+            found.append(list(divmod(i, self.cols)))
+            i = self.cells.find(value, i + 1)
+        return found
 
-    def nextAction(self):
-        print(self.game.gameType)
+    def searchState(self):
+        """The underlying board's attributes other than its cells, which snapshots copy instead of the cells."""
+        return {k: v for (k, v) in vars(self.board).items()
+                if not (isinstance(v, list) and v and (isinstance(v[0], list) or len(v) == len(self.cells)))}
 
-        nextMove = self.robot.nextMove(self.game, self.game.gameType)
+    def restoreCells(self, current):
+        """Write to the underlying board every cell that differs between these bytes and current, the bytes of
+        the board as it now is. Used by restore, which shares one underlying board between snapshots."""
+        step = 4096
+        for start in range(0, len(self.cells), step):
+            if self.cells[start:start + step] == current[start:start + step]:
+                continue
+            for i in range(start, min(start + step, len(self.cells))):
+                if self.cells[i] != current[i]:
+                    (r, c) = divmod(i, self.cols)
+                    self.board.updateSpace(r, c, self.cells[i])
 
-        if self.game.gameType == 1 or self.game.gameType == 2:
-            if nextMove == "STOP":
-                self.checkGoal()
-                self.done = True
-            else:
-                self.game.moveRobot(nextMove, verbose=True)
-                self.moveList.append((self.game.currentRow, self.game.currentCol, nextMove))
-        if self.game.gameType == 3:
+    def refresh(self, positions):
+        """Copy the given cells back from the underlying board, after Search may have changed them directly."""
+        for (r, c) in positions:
+            self.setCell(r, c, self.board.scanSpace(r, c))
 
-            if nextMove == "STOP":
-                self.checkGoal()
-                self.done = True
-            else:
-                print("Moving robot")
-                self.game.moveRobot(nextMove, verbose=True)
-                print("Moving Enemy")
-                self.game.moveEnemyRobots(verbose=True)
-                self.moveList.append((self.game.currentRow, self.game.currentCol, nextMove))
 
-    def checkGoal(self):
-        if self.game.gameType == 1:
-            if self.game.atGoal():
-                print(str(self.robot.name) + " has successfully navigated the terrain!")
-                print("Moves made: " + str(self.game.movesMade))
-                print("Collisions: " + str(self.game.collisions))
-                return True
-            else:
-                print(str(self.robot.name) + " did not reach the goal.")
-                print("Moves made: " + str(self.game.movesMade))
-                print("Collisions: " + str(self.game.collisions))
-                return False
-        if self.game.gameType == 2:
-            if self.game.atGoal():
-                print(str(self.robot.name) + " has successfully navigated the terrain!")
-                print("Moves made: " + str(self.game.movesMade))
-                print("Collisions: " + str(self.game.collisions))
-                print("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
-                return True
-            else:
-                print(str(self.robot.name) + " did not reach the goal.")
-                print("Moves made: " + str(self.game.movesMade))
-                print("Collisions: " + str(self.game.collisions))
-                print("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
-                return False
-        if self.game.gameType == 3:
-            if self.game.atGoal():
-                print(str(self.robot.name) + " has successfully navigated the terrain!")
-                print("Moves made: " + str(self.game.movesMade))
-                print("Collisions: " + str(self.game.collisions))
-                print("Enemy Collisions: " + str(self.game.enemyCollisions))
-                print("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
-                return True
-            else:
-                print(str(self.robot.name) + " did not reach the goal.")
-                print("Moves made: " + str(self.game.movesMade))
-                print("Collisions: " + str(self.game.collisions))
-                print("Enemy Collisions: " + str(self.game.enemyCollisions))
-                print("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
-                return False
+def packBoard(game):
+    if not isinstance(game.board, PackedBoard):
+        game.board = PackedBoard(game.board, game.enemyList)
+    return game
 
 
-PATH = ''
-if getattr(sys, 'frozen', False):
-    PATH = os.path.dirname(sys.executable)
-elif __file__:
-    PATH = os.path.dirname(__file__)
+_WALLS = bytes(1 if i == 1 else 0 for i in range(256))  # translate table: walls to 1, anything else to 0
+_NONEMPTY = bytes(0 if i == 0 else 1 for i in range(256))
+_NONEMPTY_BUT_ENEMIES = bytes(0 if i == 0 or i == 5 else 1 for i in range(256))
+_INVERT = bytes(1 - i if i < 2 else i for i in range(256))
 
-if __name__ == '__main__':
-    ROOT = tk.Tk()
-    [gT, mazeFile] = [3, "exampleMazes/GameType3/50Squares-PDFK.txt"]
-    gameState = GameState(gT, mazeFile, Robot.Robot)
+
+def _threshold(density):
+    # translate table turning uniform random bytes into walls with probability density
+    limit = int(round(density * 256))
+    return bytes(1 if i < limit else 0 for i in range(256))
+
+
+def _densityGrid(rows, cols, density, rng):
+    grid = Grid(rows, cols)
+    grid.cells[:] = rng.randbytes(rows * cols).translate(_threshold(density))
+    return grid
+
+
+def _backtrackerGrid(rows, cols, density, rng):
+    # Perfect maze by depth first search over the cells with even coordinates, walls between them
+    grid = Grid(rows, cols, 1)
+    R = (rows + 1) // 2
+    C = (cols + 1) // 2
+    seen = bytearray(R * C)
+    stack = [0]
+    seen[0] = 1
+    grid.cells[0] = 0
+    steps = ((-1, 0), (1, 0), (0, -1), (0, 1))
+    while stack:
+        here = stack[-1]
+        (i, j) = divmod(here, C)
+        options = [(i + di, j + dj) for (di, dj) in steps
+                   if 0 <= i + di < R and 0 <= j + dj < C and not seen[(i + di) * C + j + dj]]
+        if not options:
+            stack.pop()
+            continue
+        (ni, nj) = options[rng.randrange(len(options))]
+        seen[ni * C + nj] = 1
+        grid.updateSpace(i + ni, j + nj, 0)  # The wall between the two cells
+        grid.updateSpace(2 * ni, 2 * nj, 0)
+        stack.append(ni * C + nj)
+    return grid
+
+
+def _binaryGrid(rows, cols, density, rng):
+    # Perfect maze where every cell with even coordinates opens either north or east, one row at a time
+    grid = Grid(rows, cols, 1)
+    C = (cols + 1) // 2
+    east = bytes(1 if i < 128 else 0 for i in range(256))
+    for i in range((rows + 1) // 2):
+        if i == 0:
+            bits = bytearray([1]) * C
+        else:
+            bits = bytearray(rng.randbytes(C).translate(east))
+        bits[C - 1] = 0  # The last column can only open north
+        r = 2 * i
+        row = bytearray([1]) * cols
+        row[0::2] = bytes(C)
+        row[1::2] = bits[:len(row[1::2])].translate(_INVERT)
+        grid.cells[r * cols:(r + 1) * cols] = row
+        if i > 0:
+            north = bytearray([1]) * cols
+            north[0::2] = bits
+            grid.cells[(r - 1) * cols:r * cols] = north
+    return grid
+
+
+def _roomsGrid(rows, cols, density, rng):
+    # Rectangular rooms, each joined to the one before by an L shaped corridor
+    grid = Grid(rows, cols, 1)
+    count = max(1, min(rows * cols // 150, ROOM_LIMIT))
+    last = None
+    for n in range(count):
+        h = min(rng.randint(3, 10), rows)
+        w = min(rng.randint(3, 10), cols)
+        r0 = rng.randrange(rows - h + 1)
+        c0 = rng.randrange(cols - w + 1)
+        for r in range(r0, r0 + h):
+            grid.fillRow(r, c0, c0 + w, 0)
+        centre = (r0 + h // 2, c0 + w // 2)
+        if last is None:
+            grid.start = list(centre)
+        else:
+            grid.fillRow(last[0], min(last[1], centre[1]), max(last[1], centre[1]) + 1, 0)
+            grid.fillCol(centre[1], min(last[0], centre[0]), max(last[0], centre[0]) + 1, 0)
+        last = centre
+    grid.goal = list(last)
+    if grid.goal == grid.start:
+        # Only one room, or rooms sharing a centre, so use a corner of the last room instead
+        grid.goal = [r0 + h - 1, c0 + w - 1]
+        if grid.goal == grid.start:
+            grid.goal = [r0, c0]
+    return grid
+
+
+GENERATORS = {"density": _densityGrid, "backtracker": _backtrackerGrid, "binary": _binaryGrid,
+              "rooms": _roomsGrid}
+
+
+def floodFill(grid, start):
+    """Mask with a 1 for every cell reachable from start without passing through a wall.
+
+    A scanline fill: each run of open cells in a row is found and marked with bytes operations, so the Python
+    work is per run rather than per cell."""
+    cols = grid.cols
+    blocked = bytearray(grid.cells.translate(_WALLS))  # Walls, and cells already filled
+    reached = bytearray(len(blocked))
+    seeds = [start[0] * cols + start[1]]
+    while seeds:
+        i = seeds.pop()
+        if blocked[i]:
+            continue
+        rowStart = i - i % cols
+        rowEnd = rowStart + cols
+        lo = blocked.rfind(1, rowStart, i) + 1 or rowStart
+        hi = blocked.find(1, i, rowEnd)
+        if hi < 0:
+            hi = rowEnd
+        blocked[lo:hi] = bytes([1]) * (hi - lo)
+        reached[lo:hi] = bytes([1]) * (hi - lo)
+        for offset in (-cols, cols):
+            if not (0 <= rowStart + offset < len(blocked)):
+                continue
+            x = lo + offset
+            end = hi + offset
+            while x < end:
+                x = blocked.find(0, x, end)
+                if x < 0:
+                    break
+                seeds.append(x)
+                x = blocked.find(1, x, end)
+                if x < 0:
+                    break
+    return reached
+
+
+def _openCell(grid, rng, mask=None, tries=1000):
+    # A random empty cell (reachable, if a mask is given), or None if none turns up quickly
+    for _ in range(tries):
+        i = rng.randrange(len(grid.cells))
+        if grid.cells[i] == 0 and (mask is None or mask[i]):
+            return list(divmod(i, grid.cols))
+    return None
+
+
+def boardFits(rows, cols, algorithm):
+    """Whether algorithm can build a rows by cols board with the start and the goal on different cells."""
+    if algorithm in ("backtracker", "binary"):
+        return max(rows, cols) >= 3  # Only cells with even coordinates are open
+    return rows * cols >= 2
+
+
+def generateGrid(rows, cols, algorithm="density", density=0.2, items=0, enemies=0, seed=None, verify=None):
+    """Generate a board whose goal is reachable from its start.
+
+    algorithm is one of GENERATORS; density only affects the "density" algorithm. Mazes with the same arguments
+    and seed are identical. Unless verify is False, reachability is checked with floodFill and objects and
+    enemies are only placed in the reachable part of the board; by default this is skipped for boards over
+    VERIFY_CELLS cells, where the route is guaranteed by construction instead."""
+    if not boardFits(rows, cols, algorithm):
+        raise ValueError("a %dx%d %s board has no room for both a start and a goal" % (rows, cols, algorithm))
+    rng = random.Random(seed)
+    grid = GENERATORS[algorithm](rows, cols, density, rng)
+    path = None
+    if algorithm == "density":
+        # Carve a random staircase from start to goal so that a route always exists
+        start = rng.randrange(rows * cols)
+        goal = rng.randrange(rows * cols - 1)
+        grid.start = list(divmod(start, cols))
+        grid.goal = list(divmod(goal + (goal >= start), cols))  # Any cell but the start
+        (r, c) = grid.start
+        moves = [0] * abs(grid.goal[0] - r) + [1] * abs(grid.goal[1] - c)
+        rng.shuffle(moves)
+        path = [(r, c)]
+        for move in moves:
+            if move == 0:
+                r += 1 if grid.goal[0] > r else -1
+            else:
+                c += 1 if grid.goal[1] > c else -1
+            path.append((r, c))
+        for (r, c) in path:
+            grid.updateSpace(r, c, 0)
+    elif algorithm != "rooms":
+        grid.goal = [(rows - 1) // 2 * 2, (cols - 1) // 2 * 2]
+    if verify is None:
+        verify = rows * cols <= VERIFY_CELLS
+    mask = None
+    if verify:
+        mask = floodFill(grid, grid.start)
+        if not mask[grid.goal[0] * cols + grid.goal[1]]:
+            raise ValueError("generated board has no route from start to goal")
+    grid.updateSpace(grid.start[0], grid.start[1], 3)
+    grid.updateSpace(grid.goal[0], grid.goal[1], 2)
+    for n in range(items + enemies):
+        if mask is None and path is not None:
+            # Without a fill, only the carved route is known to be reachable
+            free = [p for p in path if grid.scanSpace(p[0], p[1]) == 0]
+            cell = list(free[rng.randrange(len(free))]) if free else None
+        else:
+            cell = _openCell(grid, rng, mask)
+        if cell is None:
+            break
+        if n < items:
+            grid.updateSpace(cell[0], cell[1], 4)
+            grid.objects.append(cell)
+        else:
+            grid.updateSpace(cell[0], cell[1], 5)
+            grid.enemies.append((cell[0], cell[1], rng.choice(GENERATED_TACTICS)))
+    return grid
+
+
+def gameFromGrid(grid, gameType):
+    """A Search.Game playing on grid. Search builds an empty board of the right size, then every non-empty cell
+    of the grid is copied across. Enemies are handed to Search as (row, col, tactic) tuples; only game type 3
+    has enemies, so for the others their cells are left empty."""
+    enemies = gameType == 3
+    game = Search.Game(gameType=gameType, file="", rows=grid.rows, cols=grid.cols, density=0, items=0,
+                       eTups=list(grid.enemies) if enemies else [])
+    board = game.board
+    for (r, c) in (board.start, board.goal):
+        board.updateSpace(r, c, 0)
+    nonEmpty = grid.cells.translate(_NONEMPTY if enemies else _NONEMPTY_BUT_ENEMIES)
+    i = nonEmpty.find(1)
+    while i >= 0:
+        (r, c) = divmod(i, grid.cols)
+        board.updateSpace(r, c, grid.cells[i])
+        i = nonEmpty.find(1, i + 1)
+    board.start = list(grid.start)
+    board.goal = list(grid.goal)
+    game.currentRow, game.currentCol = grid.start
+    game.totalItems = board.totalItems = len(grid.objects)
+    return game
+
+
+def gridFromGame(game):
+    """Copy a game's packed board into a Grid, noting its start, goal, objects and enemies."""
+    board = game.board
+    grid = Grid(board.rows, board.cols)
+    grid.cells[:] = board.cells
+    grid.objects = [list(p) for p in sorted(board.objects)]
+    grid.start = list(game.getStart())
+    grid.goal = list(game.getGoal())
+    grid.enemies = [(en.currRow, en.currCol, en.tactic) for en in game.enemyList]
+    return grid
+
+
+# magic, version, flags, rows, cols, entries, cells offset, cells length, rows per compressed block
+BINARY_HEADER = struct.Struct("<4sHHIIIQQI")
+BINARY_ENTRY = struct.Struct("<IIBB")  # row, col, cell value, enemy tactic
+BINARY_MAGIC = b"CSMZ"
+BINARY_VERSION = 1
+BINARY_BITS = 1  # cells are one bit each, set for walls, with everything else in the entry table
+BINARY_ZLIB = 2  # cells are zlib compressed
+BINARY_LEVEL = 1  # zlib level; higher saves a third of the space on byte-per-cell mazes but writes ten times slower
+BINARY_BLOCK = 1 << 18  # uncompressed bytes of rows compressed together, the most inflated to read one row
+BINARY_TACTICS = ("", "predefined-known", "predefined-unknown", "random", "aggressive")
+_WALL_DIGITS = bytes(ord("1") if i == 1 else ord("0") for i in range(256))  # walls to "1", anything else to "0"
+_ENTITIES = bytes(1 if i in (2, 3, 4) else 0 for i in range(256))  # starts, goals and objects to 1
+_UNPACK = [bytes((b >> k) & 1 for k in range(8)) for b in range(256)]  # packed byte -> its 8 cells
+
+
+def isBinaryMaze(path):
+    return path.endswith(BINARY_MAZE_EXT)
+
+
+def writeMaze(grid, path, bits=False, compress=True):
+    """Save grid in the binary maze format: a header, a table of every start, goal, object and enemy, then the
+    cells row by row, either one byte each or, with bits, one bit each for walls only. Compressed cells are
+    stored in blocks of rows, each compressed on its own and found through a table of offsets, so that one row can
+    be read without inflating the rest. Rows are written and compressed one at a time, so no second copy of a huge
+    board is made."""
+    entries = []
+    special = grid.cells.translate(_ENTITIES)
+    i = special.find(1)
+    while i >= 0:
+        (r, c) = divmod(i, grid.cols)
+        entries.append(BINARY_ENTRY.pack(r, c, grid.cells[i], 0))
+        i = special.find(1, i + 1)
+    for (r, c, tactic) in grid.enemies:
+        entries.append(BINARY_ENTRY.pack(r, c, 5, BINARY_TACTICS.index(tactic)))
+    flags = (BINARY_BITS if bits else 0) | (BINARY_ZLIB if compress else 0)
+    offset = BINARY_HEADER.size + BINARY_ENTRY.size * len(entries)
+    rowBytes = (grid.cols + 7) // 8 if bits else grid.cols
+    blockRows = max(1, BINARY_BLOCK // max(rowBytes, 1)) if compress else 0
+    blocks = []  # where each block starts in the cell section, then where the last one ends
+    length = 0
+    with open(path, "wb") as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, grid.rows, grid.cols, len(entries), 0, 0, 0))
+        f.write(b"".join(entries))
+        if compress:
+            table = struct.Struct("<%dQ" % (-(-grid.rows // blockRows) + 1))
+            f.write(bytes(table.size))  # filled in once the blocks' sizes are known
+            length = table.size
+        for r in range(grid.rows):
+            line = grid.cells[r * grid.cols:(r + 1) * grid.cols]
+            if bits:
+                # Bit c of the row, counting from the least significant bit of its first byte, is cell c
+                line = int(line.translate(_WALL_DIGITS)[::-1] or b"0", 2).to_bytes(rowBytes, "little")
+            if compress:
+                if r % blockRows == 0:
+                    blocks.append(length)
+                    packer = zlib.compressobj(BINARY_LEVEL)
+                line = packer.compress(line)
+                if r % blockRows == blockRows - 1 or r == grid.rows - 1:
+                    line += packer.flush()
+            f.write(line)
+            length += len(line)
+        if compress:
+            blocks.append(length)
+            f.seek(offset)
+            f.write(table.pack(*blocks))
+        f.seek(0)
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, grid.rows, grid.cols, len(entries), offset,
+                                   length, blockRows))
+
+
+class MazeFile:
+    """A binary maze file, memory mapped. Opening it reads only the header and entry table. Rows are read as they
+    are asked for, inflating only the block of rows holding them in a compressed file, and the cells of an
+    uncompressed byte-per-cell file are never copied at all, so even a 10000x10000 maze opens at once.
+
+    Use as a context manager, or close when finished."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.flags, self.rows, self.cols, count, self.offset, self.length,
+         self.blockRows) = BINARY_HEADER.unpack_from(self.map)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            self.map.close()
+            raise ValueError("%s is not a version %d binary maze" % (path, BINARY_VERSION))
+        self.entries = list(BINARY_ENTRY.iter_unpack(self.map[BINARY_HEADER.size:self.offset]))
+        self.start = next(([r, c] for (r, c, value, t) in self.entries if value == 3), [0, 0])
+        self.goal = next(([r, c] for (r, c, value, t) in self.entries if value == 2),
+                         [self.rows - 1, self.cols - 1])
+        self.objects = [[r, c] for (r, c, value, t) in self.entries if value == 4]
+        self.enemies = [(r, c, BINARY_TACTICS[t]) for (r, c, value, t) in self.entries if value == 5]
+        self.rowBytes = (self.cols + 7) // 8 if self.flags & BINARY_BITS else self.cols
+        self.blocks = ()  # offsets of the compressed blocks in the cell section, and of its end
+        if self.flags & BINARY_ZLIB:
+            self.blocks = struct.unpack_from("<%dQ" % (-(-self.rows // self.blockRows) + 1), self.map, self.offset)
+        self.last = (None, b"")  # the block most recently inflated, and its rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.last = (None, b"")
+        self.map.close()
+
+    def cells(self):
+        """The cell section of an uncompressed file, as a memoryview straight onto the file."""
+        return memoryview(self.map)[self.offset:self.offset + self.length]
+
+    def block(self, b):
+        """The stored rows of compressed block b, inflated."""
+        if self.last[0] != b:
+            start = self.offset + self.blocks[b]
+            self.last = (b, zlib.decompress(self.map[start:self.offset + self.blocks[b + 1]]))
+        return self.last[1]
+
+    def decode(self, stored):
+        """Cell values of one stored row. Bit-packed rows hold only walls; the entry table fills in the rest."""
+        if self.flags & BINARY_BITS:
+            return b"".join(map(_UNPACK.__getitem__, stored))[:self.cols]
+        return bytes(stored)
+
+    def row(self, r):
+        """Cell values of row r, one byte each. Objects, starts and goals are left out of bit-packed files' rows."""
+        if not self.flags & BINARY_ZLIB:
+            return self.decode(self.cells()[r * self.rowBytes:(r + 1) * self.rowBytes])
+        (b, i) = divmod(r, self.blockRows)
+        return self.decode(self.block(b)[i * self.rowBytes:(i + 1) * self.rowBytes])
+
+    def iterRows(self):
+        """Yield the cell values of every row in turn, holding at most one inflated block of a compressed file."""
+        for r in range(self.rows):
+            yield self.row(r)
+
+    def grid(self):
+        """The whole maze as a Grid."""
+        grid = Grid(self.rows, self.cols)
+        if self.flags == 0:
+            grid.cells[:] = self.cells()
+        else:
+            for (r, line) in enumerate(self.iterRows()):
+                grid.cells[r * self.cols:(r + 1) * self.cols] = line
+        for (r, c, value, t) in self.entries:
+            grid.updateSpace(r, c, value)
+        grid.start = list(self.start)
+        grid.goal = list(self.goal)
+        grid.objects = [list(p) for p in self.objects]
+        grid.enemies = list(self.enemies)
+        return grid
+
+
+def readMaze(path):
+    """The Grid saved in a binary maze file."""
+    with MazeFile(path) as f:
+        return f.grid()
+
+
+def convertMaze(source, dest, bits=False, compress=True, gameType=3):
+    """Copy the maze in source to dest, each either a text maze or (ending in BINARY_MAZE_EXT) a binary one. Text
+    mazes are read and written by Search itself, so they stay exactly as the coursework expects."""
+    if isBinaryMaze(source):
+        grid = readMaze(source)
+    else:
+        grid = gridFromGame(packBoard(Search.Game(gameType=gameType, file=source)))
+    if isBinaryMaze(dest):
+        writeMaze(grid, dest, bits, compress)
+    else:
+        gameFromGrid(grid, gameType).board.writeBoard(dest)
+
+
+class Oracle:
+    """Shortest possible runs on a board, to score robots against.
+
+    Distances come from breadth first searches over the board, treating only walls as blocking (so enemies are
+    ignored and game type 3 gets the same lower bound as game type 1). For game type 2 the robot must visit every
+    object on its way from start to goal; the best order is found exactly by dynamic programming over the
+    pairwise distances for up to EXACT_OBJECTS objects, and by nearest neighbour improved with 2-opt above that."""
+    EXACT_OBJECTS = 12
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.toGoal = self.distances(grid.goal)
+
+    def distances(self, source):
+        """Moves from source to every cell, or -1 where a cell cannot be reached."""
+        grid = self.grid
+        cols = grid.cols
+        blocked = grid.cells.translate(_WALLS)
+        dist = array.array("i", [-1]) * len(blocked)
+        first = source[0] * cols + source[1]
+        dist[first] = 0
+        queue = collections.deque([first])
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            c = i % cols
+            for (j, ok) in ((i - cols, i >= cols), (i + cols, i + cols < len(blocked)), (i - 1, c > 0),
+                            (i + 1, c < cols - 1)):
+                if ok and dist[j] < 0 and not blocked[j]:
+                    dist[j] = d
+                    queue.append(j)
+        return dist
+
+    def distanceToGoal(self, row, col):
+        return self.toGoal[row * self.grid.cols + col]
+
+    def shortest(self):
+        """Fewest moves from start to goal, or None if the goal cannot be reached."""
+        d = self.distanceToGoal(*self.grid.start)
+        return d if d >= 0 else None
+
+    def tour(self):
+        """(moves, order, exact) for the shortest run from start through every object to the goal. moves is None
+        if that is impossible; order lists the objects by index into grid.objects."""
+        points = [self.grid.start] + self.grid.objects
+        n = len(self.grid.objects)
+        cols = self.grid.cols
+        # dist[a][b] for a, b in points, plus dist[a][n + 1] to the goal
+        dist = []
+        for p in points:
+            field = self.distances(p)
+            dist.append([field[q[0] * cols + q[1]] for q in points] + [self.distanceToGoal(*p)])
+        if any(d < 0 for row in dist for d in row):
+            return (None, [], True)
+        if n == 0:
+            return (dist[0][1], [], True)
+        if n <= self.EXACT_OBJECTS:
+            return self._heldKarp(dist, n)
+        return self._twoOpt(dist, n)
+
+    def _heldKarp(self, dist, n):
+        # best[mask][j]: shortest route from start visiting the objects in mask, ending at object j
+        full = (1 << n) - 1
+        inf = float("inf")
+        best = [[inf] * n for _ in range(1 << n)]
+        back = [[-1] * n for _ in range(1 << n)]
+        for j in range(n):
+            best[1 << j][j] = dist[0][j + 1]
+        for mask in range(1, full + 1):
+            for j in range(n):
+                here = best[mask][j]
+                if here == inf or not mask & (1 << j):
+                    continue
+                for k in range(n):
+                    if mask & (1 << k):
+                        continue
+                    step = here + dist[j + 1][k + 1]
+                    if step < best[mask | (1 << k)][k]:
+                        best[mask | (1 << k)][k] = step
+                        back[mask | (1 << k)][k] = j
+        last = min(range(n), key=lambda j: best[full][j] + dist[j + 1][n + 1])
+        moves = best[full][last] + dist[last + 1][n + 1]
+        order = []
+        mask = full
+        while last >= 0:
+            order.append(last)
+            (mask, last) = (mask & ~(1 << last), back[mask][last])
+        return (moves, order[::-1], True)
+
+    def _twoOpt(self, dist, n):
+        def length(order):
+            route = [0] + [j + 1 for j in order]
+            return sum(dist[a][b] for (a, b) in zip(route, route[1:])) + dist[route[-1]][n + 1]
+
+        order = []
+        here = 0
+        left = set(range(n))
+        while left:
+            nxt = min(left, key=lambda j: dist[here][j + 1])
+            order.append(nxt)
+            left.discard(nxt)
+            here = nxt + 1
+        improved = True
+        while improved:
+            improved = False
+            for a in range(n - 1):
+                for b in range(a + 1, n):
+                    candidate = order[:a] + order[a:b + 1][::-1] + order[b + 1:]
+                    if length(candidate) < length(order):
+                        order = candidate
+                        improved = True
+        return (length(order), order, False)
+
+
+class OracleCache:
+    """Optimal move counts per maze, kept in memory by content hash and on disk in a ".oracle.json" file next to
+    each maze file, so that a maze is only ever solved once."""
+    VERSION = 1
+
+    def __init__(self):
+        self.results = {}  # content hash -> {game type: optimal moves}, for the game types solved so far
+
+    def optimal(self, game, gameType, path=None):
+        """Fewest moves that can complete game's board for gameType, or None if it cannot be completed. Boards
+        loaded unchanged from path are solved once per game type and remembered; anything else is solved every
+        time."""
+        digest = MAZE_CACHE.digest(path) if path else None
+        result = {}
+        if digest:
+            if digest not in self.results:
+                self.results[digest] = self.fromDisk(path, digest) or {}
+            result = self.results[digest]
+        if str(gameType) not in result:
+            result.update(self.solve(game, gameType))
+            if digest:
+                self.toDisk(path, digest, result)
+        return result[str(gameType)]
+
+    def solve(self, game, gameType):
+        """{game type: optimal moves} for gameType, and for any other game type that comes free with it."""
+        oracle = Oracle(gridFromGame(game))
+        if gameType == 2:
+            return {"2": oracle.tour()[0]}
+        shortest = oracle.shortest()
+        return {"1": shortest, "3": shortest}  # Enemies are ignored, so these are the same
+
+    def fromDisk(self, path, digest):
+        try:
+            with open(path + ".oracle.json") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("version") != self.VERSION or stored.get("hash") != digest:
+            return None
+        return stored["optimal"]
+
+    def toDisk(self, path, digest, result):
+        try:
+            with open(path + ".oracle.json", "w") as f:
+                json.dump({"version": self.VERSION, "hash": digest, "optimal": result}, f)
+        except OSError:
+            pass  # The maze directory may be read only; the result is still remembered in memory
+
+
+ORACLE_CACHE = OracleCache()
+
+
+class StepMetrics:
+    """Rolling timings of each phase of a step: the robot choosing its move, the engine moving the robot and
+    the enemies, and drawing the result. Only the latest window samples of each phase are kept."""
+    PHASES = ("robot", "moveRobot", "moveEnemies", "render")
+    FIELDS = ["phase", "count", "mean", "p50", "p95", "max"]
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.samples = {phase: collections.deque(maxlen=window) for phase in self.PHASES}
+        self.counts = dict.fromkeys(self.PHASES, 0)
+
+    def record(self, phase, seconds):
+        self.samples[phase].append(seconds)
+        self.counts[phase] += 1
+
+    def merge(self, other):
+        for phase in self.PHASES:
+            self.samples[phase].extend(other.samples[phase])
+            self.counts[phase] += other.counts[phase]
+
+    def summary(self):
+        """Per phase, the number of samples ever taken and the mean, median, 95th percentile and maximum of the
+        current window, in milliseconds."""
+        rows = []
+        for phase in self.PHASES:
+            times = sorted(self.samples[phase])
+            row = {"phase": phase, "count": self.counts[phase], "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+            if times:
+                row["mean"] = 1000 * sum(times) / len(times)
+                row["p50"] = 1000 * times[len(times) // 2]
+                row["p95"] = 1000 * times[min(int(len(times) * 0.95), len(times) - 1)]
+                row["max"] = 1000 * times[-1]
+            rows.append(row)
+        return rows
+
+    def export(self, path):
+        """Write the summary to path, as JSON if it ends in .json and as CSV otherwise."""
+        with open(path, "w", newline="") as f:
+            if path.endswith(".json"):
+                json.dump(self.summary(), f, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                writer.writeheader()
+                writer.writerows(self.summary())
+
+
+class MazeCache:
+    """Parsed mazes, so that each maze file is only read and parsed once however many runs use it.
+
+    Files are identified by a hash of their contents, looked up by path, modification time and size, so
+    identical mazes share one entry and a file changed on disk is parsed again. Each entry holds the parsed game
+    pickled, which costs less memory than the live objects and gives a fresh, independent copy faster than
+    deepcopy. At most size entries are kept, dropping the least recently used."""
+
+    def __init__(self, size=MAZE_CACHE_SIZE):
+        self.size = size
+        self.games = collections.OrderedDict()  # (content hash, other game arguments) -> pickled Search.Game
+        self.digests = {}  # (path, mtime, size) -> content hash
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, path):
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self.digests:
+            if len(self.digests) >= 4 * self.size:
+                self.digests.clear()
+            with open(path, "rb") as f:
+                self.digests[key] = hashlib.sha1(f.read()).hexdigest()
+        return self.digests[key]
+
+    def clear(self):
+        self.games.clear()
+
+    def forget(self, path):
+        path = os.path.abspath(path)
+        for key in [k for k in self.digests if k[0] == path]:
+            del self.digests[key]
+
+    def key(self, gameArgs):
+        generator = gameArgs.get('generator')
+        if not self.size or not (gameArgs.get('file') or (generator and generator.get('seed') is not None)):
+            return None  # Unseeded generated boards are random, so never cached
+        others = tuple(sorted((k, repr(v)) for (k, v) in gameArgs.items() if k != 'file'))
+        return (self.digest(gameArgs['file']) if gameArgs.get('file') else None, others)
+
+    def load(self, gameArgs):
+        """A new Search.Game for gameArgs, parsing the maze file (or running the seeded generator) only if the
+        result is not already cached."""
+        if self.key(gameArgs) is None:
+            return self.build(gameArgs)
+        return self.fetch(gameArgs)[1]
+
+    def fetch(self, gameArgs):
+        """The pickled game for gameArgs and a new Search.Game unpickled from it, so that a caller wanting to go
+        back to the same board later can keep the bytes instead of copying the game."""
+        key = self.key(gameArgs)
+        if key is None:
+            game = self.build(gameArgs)
+            return (pickle.dumps(game, pickle.HIGHEST_PROTOCOL), game)
+        if key in self.games:
+            self.hits += 1
+            self.games.move_to_end(key)
+            return (self.games[key], pickle.loads(self.games[key]))
+        self.misses += 1
+        game = self.build(gameArgs)
+        self.games[key] = pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+        while len(self.games) > self.size:
+            self.games.popitem(last=False)
+        return (self.games[key], game)
+
+    def build(self, gameArgs):
+        if gameArgs.get('generator'):
+            return packBoard(gameFromGrid(generateGrid(**gameArgs['generator']), gameArgs['gameType']))
+        if gameArgs.get('file') and isBinaryMaze(gameArgs['file']):
+            return packBoard(gameFromGrid(readMaze(gameArgs['file']), gameArgs['gameType']))
+        return packBoard(Search.Game(**gameArgs))
+
+
+MAZE_CACHE = MazeCache()
+
+
+def _editSquare(game, target, row, col):
+    # So many special cases...
+    old = game.board.scanSpace(row, col)
+    if old == 3 or old == 5:
+        return False  # Must always have a start square so no overwriting, and overwriting enemies is not supported
+    if old == 2:
+        if game.getGoal() == [row, col]:
+            for cell in game.board.positions(2):
+                if cell != [row, col]:
+                    game.board.goal = cell
+        if game.getGoal() == [row, col]:
+            # No alternative found, so don't allow replacing final goal
+            return False
+    if old == 4:
+        # Update the game data for the new number of objects
+        game.totalItems = game.totalItems - 1
+        game.board.totalItems = game.board.totalItems - 1
+    if target == 2:
+        game.board.goal = [row, col]  # Use newest goal as target
+    if target == 3:
+        oldStart = game.getStart()
+        game.board.updateSpace(oldStart[0], oldStart[1], 0)  # Revert old start to empty
+        game.board.start = [row, col]  # Replace start with new start
+        if game.getCurrentLocation() == oldStart:  # If robot is sitting at start
+            game.currentCol = col  # Move robot to new start
+            game.currentRow = row
+    if target == 4:
+        # Update the game data for the new number of objects
+        game.totalItems = game.totalItems + 1
+        game.board.totalItems = game.board.totalItems + 1
+
+    game.board.updateSpace(row, col, target)
+    return True
+
+
+# game is the pickled board for the start of a run, otherwise a copy of the game sharing the live Search board,
+# whose own attributes are kept in search
+Snapshot = collections.namedtuple("Snapshot", "game robot search length done success failure streams")
+
+
+class GameState:
+    def __init__(self, type, maze, robot, verbose=True, checkpointInterval=CHECKPOINT_INTERVAL, metrics=None,
+                 seed=None):
+        self.robotProto = robot
+        self.seed = seed
+        self.verbose = verbose
+        self.metrics = metrics if metrics is not None else StepMetrics()
+        self.checkpointInterval = checkpointInterval
+        self.done = False
+        self.success = False
+        self.moveList = RunLog()
+        self.tempFile = None
+        self.robot = None
+        self.script = None  # a RunLog whose moves and enemy positions are being replayed
+        # maze is a file name, or a dict of further Search.Game or generator arguments
+        self.gameArgs = dict(maze, gameType=type) if isinstance(maze, dict) else {"gameType": type, "file": maze}
+        if seed is not None and self.gameArgs.get('generator') and self.gameArgs['generator'].get('seed') is None:
+            self.gameArgs['generator'] = dict(self.gameArgs['generator'], seed=seed)
+        self.reset()
+
+    def releaseRobot(self):
+        """Release anything held by the current robot, such as an out-of-process worker."""
+        if hasattr(self.robot, "close"):
+            self.robot.close()
+
+    def close(self):
+        """Release the robot and delete the state's temporary maze file, if it made one, with the oracle's answers
+        kept beside it. The state cannot be reset afterwards."""
+        self.releaseRobot()
+        if self.tempFile is not None:
+            MAZE_CACHE.forget(self.tempFile)
+            for path in (self.tempFile, self.tempFile + ".oracle.json"):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.tempFile = None
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def reset(self):
+        self.releaseRobot()
+        (board, self.game) = MAZE_CACHE.fetch(self.gameArgs)
+        self.streams = None
+        if self.seed is not None:
+            # Separate streams, so that the enemies do the same whatever use the robot makes of random
+            self.streams = {"robot": random.Random("%s:robot" % self.seed).getstate(),
+                            "enemies": random.Random("%s:enemies" % self.seed).getstate()}
+        self.done = False
+        self.success = False
+        self.failure = ""
+        self.edited = False
+        self.newLog()
+        # The start of the run is the cache's pickled board and no robot, so starting costs no copy of either
+        self.initial = Snapshot(board, None, None, len(self.moveList), False, False, "",
+                                None if self.streams is None else dict(self.streams))
+        self.startGame = None
+        self.robot = self.seeded("robot", self.robotProto)
+        self.checkpoints = []
+        self.optimalMoves = False  # not yet worked out
+        self.log("Starting in Space: " + str([self.game.currentRow, self.game.currentCol]))
+
+    def snapshot(self):
+        """An in-memory copy of the game, the robot and the run so far, which restore can return to.
+
+        The Search board's cells are not copied, only the packed bytes: every snapshot shares the live Search
+        board, and restore writes back whichever cells have changed since."""
+        robot = None if isinstance(self.robot, RemoteRobot) else self.robot
+        search = self.game.board.board
+        # one copy, so a robot holding the game stays attached
+        (game, robot, state) = copy.deepcopy((self.game, robot, self.game.board.searchState()), {id(search): search})
+        return Snapshot(game, robot, state, len(self.moveList), self.done, self.success, self.failure,
+                        None if self.streams is None else dict(self.streams))
+
+    def restore(self, snap):
+        if snap.game is None or isinstance(snap.game, bytes):
+            self.game = pickle.loads(self.startSnapshot().game)
+            self.checkpoints = []  # They share the Search board just replaced, so cannot be restored any more
+        else:
+            current = self.game.board.cells
+            search = snap.game.board.board
+            (self.game, robot, state) = copy.deepcopy((snap.game, snap.robot, snap.search), {id(search): search})
+            self.game.board.restoreCells(current)
+            vars(search).update(state)
+            if robot is not None:
+                self.robot = robot
+        self.moveList = self.moveList.prefix(snap.length)
+        self.done = snap.done
+        self.success = snap.success
+        self.failure = snap.failure
+        self.streams = None if snap.streams is None else dict(snap.streams)
+
+    def startSnapshot(self):
+        """The snapshot of the start of the run, pickling the board again if it has been edited since."""
+        if self.initial.game is None:
+            self.initial = self.initial._replace(game=pickle.dumps(self.startGame, pickle.HIGHEST_PROTOCOL))
+        return self.initial
+
+    def initialGame(self):
+        """The game as it was at the start of the run, including any edits."""
+        if self.startGame is None:
+            self.startGame = pickle.loads(self.initial.game)
+        return self.startGame
+
+    def seeded(self, stream, call, *args, **kwargs):
+        """call(*args, **kwargs), with the random module (which Search and most robots use) drawing from this
+        state's own stream of that name if the state was given a seed. Runs with the same seed then make the same
+        random choices however many other games are being played at the same time."""
+        if self.streams is None:
+            return call(*args, **kwargs)
+        saved = random.getstate()
+        random.setstate(self.streams[stream])
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.streams[stream] = random.getstate()
+            random.setstate(saved)
+
+    def rewind(self, n, record=None):
+        """Return to just after move n of record (by default this run), restoring the nearest earlier checkpoint
+        and replaying the recorded moves from there.
+
+        A seeded run moves its enemies with its own stream as it replays, rather than placing them where the record
+        has them, so that carrying on afterwards makes the same moves as a run that was never rewound. A robot in
+        its own process is not kept in checkpoints, so rewinding this run starts it again and replays it from the
+        start; if it overruns its budget doing so, the run is abandoned."""
+        live = record is None
+        if live:
+            record = self.moveList
+        n = min(max(n, 0), len(record) - 1)
+        snap = self.initial
+        if not (live and isinstance(self.robot, RemoteRobot)):
+            for c in self.checkpoints:
+                if snap.length < c.length <= n + 1:
+                    snap = c
+        self.restore(snap)
+        if live and snap.robot is None:
+            # The start of the run keeps no robot, so make it again
+            self.releaseRobot()
+            self.robot = self.seeded("robot", self.robotProto)
+        script = self.script
+        self.script = None if live and self.streams is not None else record
+        try:
+            while len(self.moveList) <= n and not self.done:
+                move = record[len(self.moveList)][2]
+                if live:
+                    # Let the robot see each position again so its own state matches the rewound game
+                    try:
+                        self.seeded("robot", self.robot.nextMove, self.game, self.game.gameType)
+                    except RobotTimeout as e:
+                        self.abandon(str(e))
+                        break
+                self.applyMove(move)
+        finally:
+            self.script = script
+        # Later checkpoints belong to moves that have been taken back, whether by this run or a replay's seek
+        self.checkpoints = [c for c in self.checkpoints if c.length <= len(self.moveList)]
+
+    def newLog(self):
+        self.moveList = RunLog(len(self.game.enemyList) if self.game.gameType == 3 else 0)
+        self.moveList.append(self.game.currentRow, self.game.currentCol, "", 0, self.enemyPositions())
+
+    def enemyPositions(self):
+        return [(en.currRow, en.currCol) for en in self.game.enemyList]
+
+    def restart(self):
+        """Start the run again from the initial board, including any edits, with a freshly made robot."""
+        self.releaseRobot()
+        self.restore(self.initial)
+        self.robot = self.seeded("robot", self.robotProto)
+        self.checkpoints = []
+        self.log("Starting in Space: " + str([self.game.currentRow, self.game.currentCol]))
+
+    def setGameType(self, gameType):
+        self.gameArgs['gameType'] = gameType
+        if self.edited:
+            # The board must be rebuilt for the new game type, so the edits have to go through a file
+            self.tempSave()
+        self.reset()
+
+    def tempSave(self):
+        # Each state gets its own temp file so that concurrent runs cannot overwrite each other's boards
+        if self.tempFile is None:
+            handle, self.tempFile = tempfile.mkstemp(prefix='cs255_cw2temp', suffix='.maze')
+            os.close(handle)
+        if os.path.exists(self.tempFile):
+            os.remove(self.tempFile)
+        self.initialGame().board.writeBoard(self.tempFile)
+        MAZE_CACHE.forget(self.tempFile)
+        self.gameArgs = {'gameType': self.gameArgs.get('gameType'), 'file': self.tempFile}
+
+    def editSquare(self, target, row, col):
+        """Change one square of the board. The same edit is made to the start of the run, so that restarting
+        keeps it. Returns False if the edit is not allowed."""
+        location = self.game.getCurrentLocation()
+        if not _editSquare(self.game, target, row, col):
+            return False
+        _editSquare(self.initialGame(), target, row, col)
+        self.initial = self.initial._replace(game=None)  # pickled again when next needed
+        if self.game.getCurrentLocation() != location:
+            self.newLog()  # The robot was moved along with the start
+        self.edited = True
+        self.checkpoints = []
+        self.optimalMoves = False
+        return True
+
+    def nextAction(self):
+        start = time.perf_counter()
+        try:
+            nextMove = self.seeded("robot", self.robot.nextMove, self.game, self.game.gameType)
+        except RobotTimeout as e:
+            self.abandon(str(e))
+            return
+        self.metrics.record("robot", time.perf_counter() - start)
+        self.applyMove(nextMove)
+
+    def applyMove(self, nextMove):
+        if nextMove == "STOP":
+            self.success = self.checkGoal()
+            self.done = True
+            self.moveList.append(self.game.currentRow, self.game.currentCol, nextMove, 0, self.enemyPositions())
+            return
+        before = (self.game.collisions, self.game.enemyCollisions, self.game.itemsRetrieved)
+        enemies = self.enemyPositions()
+        touched = [self.game.getCurrentLocation()] + enemies
+        start = time.perf_counter()
+        if self.game.gameType == 1 or self.game.gameType == 2:
+            self.searchCall(self.game.moveRobot, nextMove, verbose=self.verbose)
+            self.metrics.record("moveRobot", time.perf_counter() - start)
+        if self.game.gameType == 3:
+            self.log("Moving robot")
+            self.searchCall(self.game.moveRobot, nextMove, verbose=self.verbose)
+            moved = time.perf_counter()
+            self.metrics.record("moveRobot", moved - start)
+            self.log("Moving Enemy")
+            self.moveEnemies()
+            self.metrics.record("moveEnemies", time.perf_counter() - moved)
+        # Search moved on its own board, so recopy any cells it could have changed
+        self.game.board.refresh(touched + [self.game.getCurrentLocation()] + self.enemyPositions())
+        self.game.board.moveEnemies(self.game.enemyList, enemies)
+        events = 0
+        if self.game.collisions != before[0]:
+            events |= RunLog.COLLISION
+        if self.game.enemyCollisions != before[1]:
+            events |= RunLog.ATTACK
+        if self.game.itemsRetrieved != before[2]:
+            events |= RunLog.PICKUP
+        self.moveList.append(self.game.currentRow, self.game.currentCol, nextMove, events, self.enemyPositions())
+        interval = self.checkpointInterval
+        if interval and len(self.moveList) % interval == 0:
+            if not self.checkpoints or self.checkpoints[-1].length < len(self.moveList):
+                self.checkpoints.append(self.snapshot())
+
+    def moveEnemies(self):
+        if self.script is not None:
+            self.placeEnemies(self.script.enemiesAt(len(self.moveList)))
+        else:
+            self.seeded("enemies", self.searchCall, self.game.moveEnemyRobots, verbose=self.verbose)
+
+    def searchCall(self, call, *args, **kwargs):
+        """call(*args, **kwargs), one of Search's own moves, with the game holding Search's board rather than the
+        packed one. Search then reads its cells as it has left them part way through the move, and applyMove
+        copies the cells it could have changed back into the packed bytes afterwards."""
+        packed = self.game.board
+        self.game.board = packed.board
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.game.board = packed
+
+    def placeEnemies(self, positions):
+        board = self.game.board
+        before = self.enemyPositions()
+        for en in self.game.enemyList:
+            if board.scanSpace(en.currRow, en.currCol) == 5:
+                board.updateSpace(en.currRow, en.currCol, 0)
+        for (en, (r, c)) in zip(self.game.enemyList, positions):
+            en.currRow = r
+            en.currCol = c
+            board.updateSpace(r, c, 5)
+        board.moveEnemies(self.game.enemyList, before)
+
+    def mazeText(self):
+        """The board the run started from, in the text maze format."""
+        handle, path = tempfile.mkstemp(prefix='cs255_replay', suffix='.maze')
+        os.close(handle)
+        try:
+            os.remove(path)
+            self.initialGame().board.writeBoard(path)
+            with open(path) as f:
+                return f.read()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def saveRun(self, path):
+        self.moveList.write(path, self.game.gameType, str(self.robot.name), self.mazeText())
+
+    def abandon(self, reason):
+        """Stop the run because the robot misbehaved, recording why."""
+        self.log(str(self.robot.name) + " was stopped: " + reason)
+        self.failure = reason
+        self.success = False
+        self.done = True
+
+    def run(self, maxSteps=MAX_STEPS):
+        """Step the robot until it returns STOP or maxSteps moves have been made, without any display."""
+        while not self.done and self.game.movesMade < maxSteps:
+            self.nextAction()
+        return self.success
+
+    def result(self):
+        return {"maze": self.gameArgs.get('file', ""), "gameType": self.game.gameType, "robot": self.robot.name,
+                "seed": self.seed, "steps": self.game.movesMade, "collisions": self.game.collisions,
+                "attacks": self.game.enemyCollisions, "retrieved": self.game.itemsRetrieved,
+                "items": self.game.totalItems, "stopped": self.done, "success": self.success, "failure": self.failure,
+                "optimal": self.optimal()}
+
+    def optimal(self):
+        """Fewest moves anyone could have completed this board in, for the current game type."""
+        if self.optimalMoves is False:
+            path = None if self.edited else self.gameArgs.get('file')
+            self.optimalMoves = ORACLE_CACHE.optimal(self.initialGame(), self.game.gameType, path)
+        return self.optimalMoves
+
+    def movesMade(self):
+        optimal = self.optimal()
+        if optimal is None:
+            return "Moves made: " + str(self.game.movesMade)
+        return "Moves made: " + str(self.game.movesMade) + " (optimal " + str(optimal) + ")"
+
+    def checkGoal(self):
+        if self.game.gameType == 1:
+            if self.game.atGoal():
+                self.log(str(self.robot.name) + " has successfully navigated the terrain!")
+                self.log(self.movesMade())
+                self.log("Collisions: " + str(self.game.collisions))
+                return True
+            else:
+                self.log(str(self.robot.name) + " did not reach the goal.")
+                self.log(self.movesMade())
+                self.log("Collisions: " + str(self.game.collisions))
+                return False
+        if self.game.gameType == 2:
+            if self.game.atGoal():
+                self.log(str(self.robot.name) + " has successfully navigated the terrain!")
+                self.log(self.movesMade())
+                self.log("Collisions: " + str(self.game.collisions))
+                self.log("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
+                return True
+            else:
+                self.log(str(self.robot.name) + " did not reach the goal.")
+                self.log(self.movesMade())
+                self.log("Collisions: " + str(self.game.collisions))
+                self.log("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
+                return False
+        if self.game.gameType == 3:
+            if self.game.atGoal():
+                self.log(str(self.robot.name) + " has successfully navigated the terrain!")
+                self.log(self.movesMade())
+                self.log("Collisions: " + str(self.game.collisions))
+                self.log("Enemy Collisions: " + str(self.game.enemyCollisions))
+                self.log("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
+                return True
+            else:
+                self.log(str(self.robot.name) + " did not reach the goal.")
+                self.log(self.movesMade())
+                self.log("Collisions: " + str(self.game.collisions))
+                self.log("Enemy Collisions: " + str(self.game.enemyCollisions))
+                self.log("Retrieved " + str(self.game.itemsRetrieved) + " out of " + str(self.game.totalItems))
+                return False
+
+
+class ReplayRobot:
+    """Stands in for the robot of a replayed run; the moves come from the log, never from nextMove."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def nextMove(self, game, gameType):
+        raise RuntimeError("a replayed run has no robot to ask for moves")
+
+
+class ReplayState(GameState):
+    """A GameState that plays back a replay file through the game engine instead of calling a robot.
+
+    Enemies are placed where the log says they were rather than moved, so playback matches the recorded run
+    exactly. seek moves to any point of the run; going backwards replays from the start."""
+
+    def __init__(self, path, verbose=True):
+        (self.record, gameType, self.robotName, maze) = RunLog.read(path)
+        self.replayFile = path
+        handle, mazeFile = tempfile.mkstemp(prefix='cs255_replay', suffix='.maze')
+        with os.fdopen(handle, "w") as f:
+            f.write(maze)
+        try:
+            super().__init__(gameType, mazeFile, lambda: ReplayRobot(self.robotName), verbose)
+        except Exception:
+            os.remove(mazeFile)
+            raise
+        self.tempFile = mazeFile
+        self.script = self.record
+
+    def nextAction(self):
+        n = len(self.moveList)
+        if n >= len(self.record):
+            self.done = True
+            return
+        self.applyMove(self.record[n][2])
+
+    def seek(self, n):
+        """Move playback to just after the nth entry of the log."""
+        n = min(max(n, 0), len(self.record) - 1)
+        if n < len(self.moveList) - 1:
+            self.rewind(n, self.record)
+        while len(self.moveList) <= n and not self.done:
+            self.nextAction()
+
+    def saveRun(self, path):
+        self.record.write(path, self.game.gameType, self.robotName, self.mazeText())
+
+
+StepEvent = collections.namedtuple("StepEvent", "state move events finished")
+
+
+class Engine:
+    """Plays any number of GameStates at once as asyncio tasks on a private event loop, publishing a StepEvent to
+    every subscriber after each move.
+
+    Headless callers hand the loop over with run. A display instead calls poll from its own timer, which runs the
+    loop for at most a time slice and returns, so neither simulation nor drawing waits on the other and one
+    process can feed several views. Subscribers are called synchronously and should be quick; a display
+    typically just notes that it needs redrawing."""
+    SLICE = 0.005  # seconds a state may run without a break before the others get a turn
+    POLL_INTERVAL = 0.005  # seconds between checks for a move from an out-of-process robot
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.subscribers = []  # (callback, state or None for every state)
+        self.tasks = {}  # GameState, or tuple of GameStates played in lockstep -> asyncio.Task playing it
+        self.eager = set()  # states whose task could carry on at once, rather than waiting for a delay or a robot
+        self.waking = {}  # state or tuple of states waiting out a delay or a robot -> loop time it next looks again
+
+    def subscribe(self, callback, state=None):
+        """Call callback(event) after every move of state, or of every state if None."""
+        self.subscribers.append((callback, state))
+
+    def unsubscribe(self, callback):
+        self.subscribers = [s for s in self.subscribers if s[0] is not callback]
+
+    def publish(self, event):
+        for (callback, state) in list(self.subscribers):
+            if state is None or state is event.state:
+                callback(event)
+
+    def start(self, state, **kwargs):
+        """Begin playing state in the background, as play(state, **kwargs), in place of any play already going."""
+        self.stop(state)
+        self.tasks[state] = self.loop.create_task(self.play(state, **kwargs))
+        return self.tasks[state]
+
+    def stop(self, state):
+        task = self.tasks.pop(state, None)
+        self.eager.discard(state)
+        self.waking.pop(state, None)
+        if task is not None:
+            task.cancel()
+
+    def running(self, state):
+        task = self.tasks.get(state)
+        return task is not None and not task.done()
+
+    async def play(self, state, maxSteps=MAX_STEPS, delay=0, batch=1, moves=None, until=None):
+        """Make moves until the run ends, maxSteps moves have been made, moves more have been made, or until(state)
+        is true after a move. With a delay, batch moves are made at a time with delay seconds between them;
+        otherwise moves are made back to back, giving other states a turn after every slice."""
+        made = 0
+        finished = False
+        sliceEnd = time.perf_counter() + self.SLICE
+        try:
+            while not finished and not state.done and state.game.movesMade < maxSteps:
+                if isinstance(state.robot, RemoteRobot):
+                    self.eager.discard(state)
+                await self.move(state)
+                made += 1
+                finished = (state.done or state.game.movesMade >= maxSteps or made == moves or
+                            (until is not None and bool(until(state))))
+                self.published(state, finished)
+                if finished:
+                    break
+                if delay:
+                    if made % batch == 0:
+                        self.eager.discard(state)
+                        await self.pause(state, delay)
+                        sliceEnd = time.perf_counter() + self.SLICE
+                elif time.perf_counter() >= sliceEnd:
+                    self.eager.add(state)
+                    await asyncio.sleep(0)
+                    sliceEnd = time.perf_counter() + self.SLICE
+            if not finished:
+                self.publish(StepEvent(state, None, 0, True))  # Nothing left to do, but say so
+        finally:
+            self.eager.discard(state)
+        return state
+
+    async def lockstep(self, states, maxSteps=MAX_STEPS, delay=0, rounds=None):
+        """Play states side by side, each making one move per round, until all have finished, or for rounds
+        rounds. Out-of-process robots think about their moves at the same time. Rounds are delay seconds apart,
+        or back to back, giving other plays a turn after every slice."""
+        key = tuple(states)
+        played = 0
+        sliceEnd = time.perf_counter() + self.SLICE
+        try:
+            while rounds is None or played < rounds:
+                active = [s for s in states if not s.done and s.game.movesMade < maxSteps]
+                if not active:
+                    break
+                await asyncio.gather(*[self.move(s) for s in active])
+                played += 1
+                for s in active:
+                    self.published(s, s.done or s.game.movesMade >= maxSteps)
+                if delay:
+                    self.eager.discard(key)
+                    await self.pause(key, delay)
+                    sliceEnd = time.perf_counter() + self.SLICE
+                elif time.perf_counter() >= sliceEnd:
+                    self.eager.add(key)
+                    await asyncio.sleep(0)
+                    sliceEnd = time.perf_counter() + self.SLICE
+        finally:
+            self.eager.discard(key)
+        return states
+
+    def startLockstep(self, states, **kwargs):
+        """Begin playing states together in the background, as lockstep(states, **kwargs). The play is then known
+        to running and stop by tuple(states)."""
+        key = tuple(states)
+        self.stop(key)
+        self.tasks[key] = self.loop.create_task(self.lockstep(states, **kwargs))
+        return self.tasks[key]
+
+    async def move(self, state):
+        """Have state make its next move, waiting on the loop for an out-of-process robot."""
+        if isinstance(state.robot, RemoteRobot):
+            move = await self.remoteMove(state)
+            if move is not None:
+                state.applyMove(move)
+        else:
+            state.nextAction()
+
+    def published(self, state, finished):
+        last = len(state.moveList) - 1
+        self.publish(StepEvent(state, state.moveList[last][2], state.moveList.eventsAt(last), finished))
+
+    async def remoteMove(self, state):
+        """Ask an out-of-process robot for its move without blocking the loop. None if the robot was stopped."""
+        robot = state.robot
+        start = time.perf_counter()
+        robot.request(state.game, state.game.gameType)
+        while True:
+            try:
+                move = robot.poll()
+            except RobotTimeout as e:
+                state.abandon(str(e))
+                return None
+            if move is not None:
+                state.metrics.record("robot", time.perf_counter() - start)
+                return move
+            await self.pause(state, self.POLL_INTERVAL)
+
+    async def pause(self, key, delay):
+        """Sleep for delay seconds, telling poll when the play of key wants to carry on."""
+        self.waking[key] = self.loop.time() + delay
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.waking.pop(key, None)
+
+    def poll(self, budget=0):
+        """Run the loop once, then for up to budget seconds: at once while any state can carry on without waiting,
+        and otherwise after sleeping until the next delay or robot check that falls within the budget. A short
+        delay then makes as many moves a frame as it allows rather than one."""
+        deadline = self.loop.time() + budget
+        self.runOnce()
+        while True:
+            now = self.loop.time()
+            if now >= deadline:
+                break
+            if not self.eager:
+                wake = min(self.waking.values(), default=deadline)
+                if wake >= deadline:
+                    break
+                if wake > now:
+                    time.sleep(wake - now)
+            self.runOnce()
+
+    def runOnce(self):
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+
+    def run(self, main=None):
+        """Run main, a coroutine, to completion on the loop, or if None every play that has been started."""
+        if main is None:
+            main = self.wait()
+        return self.loop.run_until_complete(main)
+
+    async def wait(self):
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    def close(self):
+        for state in list(self.tasks):
+            self.stop(state)
+        self.runOnce()  # Let the cancelled tasks finish
+        self.loop.close()
+
+
+class MetricsRecorder:
+    """Step event subscriber gathering the step timings of every finished play into one StepMetrics."""
+
+    def __init__(self, metrics=None):
+        self.metrics = StepMetrics() if metrics is None else metrics
+
+    def __call__(self, event):
+        if event.finished:
+            self.metrics.merge(event.state.metrics)
+
+
+class ReplayWriter:
+    """Step event subscriber saving every finished play as a .run replay file in directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, event):
+        if event.finished:
+            self.save(event.state)
+
+    def save(self, state):
+        maze = os.path.splitext(os.path.basename(state.gameArgs.get('file') or "generated"))[0]
+        stem = os.path.join(self.directory, "%s-%d-%s" % (maze, state.game.gameType, state.robot.name))
+        if state.seed is not None:
+            stem += "-seed%s" % state.seed
+        path = stem + ".run"
+        n = 1
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))  # Claim the name, even across processes
+                break
+            except FileExistsError:
+                n += 1
+                path = "%s-%d.run" % (stem, n)
+        state.saveRun(path)
+        return path
+
+
+class LiveServer:
+    """Step event subscriber serving a web page on localhost that shows the games played on an Engine as they run.
+
+    Browsers connect to /live over a WebSocket. Each new viewer is sent a snapshot of every run (its board
+    compressed, the robot, the enemies and the counters) and after that, RATE times a second, only what has
+    changed: the cells moves could have touched whose values differ from what viewers last saw, and the new
+    positions and counters. No viewer is waited for; one that falls behind misses updates and is sent fresh
+    snapshots once it has caught up."""
+    RATE = 10  # updates sent per second
+    MAX_RUNS = 64  # runs shown at once; the oldest finished runs make way for new ones
+    BACKLOG = 1 << 20  # bytes queued for a viewer before it counts as having fallen behind
+    GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"  # fixed by the WebSocket protocol
+
+    def __init__(self, engine, port=8255):
+        self.engine = engine
+        self.runs = collections.OrderedDict()  # GameState -> dict of what viewers were last sent about it
+        self.viewers = {}  # StreamWriter -> True if the viewer has fallen behind
+        self.handlers = {}  # asyncio.Task serving a connection -> its StreamWriter
+        self.nextId = 0
+        self.server = engine.loop.run_until_complete(asyncio.start_server(self.handle, "127.0.0.1", port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.sender = engine.loop.create_task(self.sendLoop())
+        engine.subscribe(self)
+
+    def __call__(self, event):
+        state = event.state
+        run = self.runs.get(state)
+        if run is None:
+            run = self.watch(state)
+        # Only cells that the robot or an enemy has stood on since the last update can have changed
+        positions = self.positions(state)
+        run["touched"].update(run["positions"])
+        run["touched"].update(positions)
+        run["positions"] = positions
+        run["finished"] = event.finished
+
+    @staticmethod
+    def positions(state):
+        return [tuple(state.game.getCurrentLocation())] + state.enemyPositions()
+
+    def watch(self, state):
+        """Show state to viewers from now on, even before it makes a move."""
+        run = self.runs.get(state)
+        if run is None:
+            run = {"id": self.nextId, "game": None, "sent": None, "touched": set(), "positions": self.positions(state),
+                   "status": None, "finished": False}
+            self.nextId += 1
+            self.runs[state] = run
+            self.broadcast(self.resync(state, run))
+            self.trim()
+        return run
+
+    def trim(self):
+        while len(self.runs) > self.MAX_RUNS:
+            old = next((s for (s, run) in self.runs.items() if run["finished"] or s.done), None)
+            if old is None:
+                return
+            self.broadcast({"type": "remove", "id": self.runs.pop(old)["id"]})
+
+    def status(self, state):
+        game = state.game
+        return {"robot": game.getCurrentLocation(), "enemies": state.enemyPositions(), "steps": game.movesMade,
+                "collisions": game.collisions, "attacks": game.enemyCollisions, "retrieved": game.itemsRetrieved,
+                "items": game.totalItems, "done": state.done, "success": state.success}
+
+    def snapshot(self, state, run):
+        """state as viewers were last told about it, for a viewer that has nothing to apply deltas to. Later deltas
+        are worked out from the same point, so they bring it up to date along with everyone else."""
+        board = state.game.board
+        maze = os.path.basename(state.gameArgs.get('file') or "generated")
+        message = {"type": "snapshot", "id": run["id"], "rows": board.rows, "cols": board.cols,
+                   "name": "%s, game type %d, %s" % (maze, state.game.gameType, state.robot.name),
+                   "cells": base64.b64encode(zlib.compress(bytes(run["sent"]), 1)).decode("ascii")}
+        message.update(run["status"])
+        return message
+
+    def resync(self, state, run):
+        # A snapshot for every viewer, after which deltas are worked out from the board as it is now
+        run["game"] = state.game
+        run["sent"] = bytearray(state.game.board.cells)
+        run["touched"].clear()
+        run["positions"] = self.positions(state)  # where the next moves start from, so their old cells are checked
+        run["status"] = self.status(state)
+        return self.snapshot(state, run)
+
+    def delta(self, state, run):
+        """What has changed in state since viewers were last sent it, or None if nothing has."""
+        if state.game is not run["game"]:
+            return self.resync(state, run)  # Reset, restarted or rewound
+        cells = state.game.board.cells
+        sent = run["sent"]
+        cols = state.game.board.cols
+        changed = []
+        for (r, c) in run["touched"]:
+            i = r * cols + c
+            if cells[i] != sent[i]:
+                sent[i] = cells[i]
+                changed.append((r, c, cells[i]))
+        run["touched"].clear()
+        if cells != sent:
+            return self.resync(state, run)  # Edited some other way, such as in the GUI
+        status = self.status(state)
+        if not changed and status == run["status"]:
+            return None
+        run["status"] = status
+        message = {"type": "delta", "id": run["id"], "cells": changed}
+        message.update(status)
+        return message
+
+    async def sendLoop(self):
+        while True:
+            await asyncio.sleep(1 / self.RATE)
+            for (state, run) in list(self.runs.items()):
+                message = self.delta(state, run)
+                if message is not None:
+                    self.broadcast(message)
+            for writer in [w for (w, behind) in self.viewers.items() if behind]:
+                if writer.transport.get_write_buffer_size() < self.BACKLOG // 4:
+                    self.viewers[writer] = False
+                    for (state, run) in list(self.runs.items()):
+                        self.send(writer, self.snapshot(state, run))
+
+    def broadcast(self, message):
+        data = self.frame(json.dumps(message, separators=(",", ":")).encode())
+        for (writer, behind) in list(self.viewers.items()):
+            if behind:
+                continue
+            if writer.transport.get_write_buffer_size() > self.BACKLOG:
+                self.viewers[writer] = True
+                continue
+            writer.write(data)
+
+    def send(self, writer, message):
+        writer.write(self.frame(json.dumps(message, separators=(",", ":")).encode()))
+
+    @staticmethod
+    def frame(payload, opcode=1):
+        # Server frames are never masked; opcode 1 is text
+        n = len(payload)
+        if n < 126:
+            head = struct.pack(">BB", 0x80 | opcode, n)
+        elif n < 1 << 16:
+            head = struct.pack(">BBH", 0x80 | opcode, 126, n)
+        else:
+            head = struct.pack(">BBQ", 0x80 | opcode, 127, n)
+        return head + payload
+
+    async def handle(self, reader, writer):
+        self.handlers[asyncio.current_task()] = writer
+        try:
+            request = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            parts = request[0].split()
+            path = parts[1] if len(parts) > 1 else ""
+            headers = {}
+            for line in request[1:]:
+                (name, sep, value) = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if path == "/live" and headers.get("upgrade", "").lower() == "websocket":
+                await self.view(reader, writer, headers.get("sec-websocket-key", ""))
+            elif path == "/":
+                page = self.PAGE.encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\nContent-Length: %d\r\n"
+                             b"Connection: close\r\n\r\n" % len(page) + page)
+                await writer.drain()
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self.viewers.pop(writer, None)
+            writer.close()
+            self.handlers.pop(asyncio.current_task(), None)
+
+    async def view(self, reader, writer, key):
+        accept = base64.b64encode(hashlib.sha1((key + self.GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        for (state, run) in list(self.runs.items()):
+            self.send(writer, self.snapshot(state, run))
+        self.viewers[writer] = False
+        while True:
+            # Viewers only ever send pings and the closing handshake, but every frame has to be read
+            head = await reader.readexactly(2)
+            opcode = head[0] & 0x0F
+            n = head[1] & 0x7F
+            if n == 126:
+                n = struct.unpack(">H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack(">Q", await reader.readexactly(8))[0]
+            if n > 1 << 16:
+                return
+            mask = await reader.readexactly(4) if head[1] & 0x80 else bytes(4)
+            payload = bytes(b ^ mask[i % 4] for (i, b) in enumerate(await reader.readexactly(n)))
+            if opcode == 8:
+                writer.write(self.frame(payload[:2], 8))
+                await writer.drain()
+                return
+            if opcode == 9:
+                writer.write(self.frame(payload, 10))
+
+    def close(self):
+        self.engine.unsubscribe(self)
+        self.server.close()
+        self.sender.cancel()
+        # Closing a connection ends its handler, which is left to finish rather than cancelled
+        for writer in list(self.handlers.values()):
+            writer.close()
+        tasks = [self.sender] + list(self.handlers)
+        self.engine.loop.run_until_complete(asyncio.wait(tasks, timeout=1))
+
+    PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>CS255 live runs</title>
+<style>
+body { font-family: sans-serif; margin: 8px; }
+.run { display: inline-block; margin: 6px; vertical-align: top; width: 300px; font-size: 12px; }
+.run.done { opacity: 0.6; }
+canvas { image-rendering: pixelated; border: 1px solid #888; display: block; }
+</style></head>
+<body><h3>Live runs <small id="status">connecting</small></h3><div id="runs"></div>
+<script>
+const COLOURS = {0: [255, 255, 255], 1: [128, 128, 128], 2: [0, 128, 0], 3: [0, 0, 255], 4: [255, 255, 0],
+                 5: [255, 255, 255]};
+const ROBOT = [255, 0, 255], ENEMY = [255, 0, 0];
+const FIELDS = ["name", "robot", "enemies", "steps", "collisions", "attacks", "retrieved", "items", "done", "success"];
+let runs = {};
+
+function colour(run, r, c) { return COLOURS[run.cells[r * run.cols + c]] || COLOURS[0]; }
+
+function paint(run, r, c, rgb) {
+  const i = 4 * (r * run.cols + c);
+  run.image.data.set(rgb, i);
+  run.image.data[i + 3] = 255;
+}
+
+function draw(run) {
+  const marks = [[run.robot, ROBOT]].concat(run.enemies.map(e => [e, ENEMY]));
+  for (const [p, rgb] of marks) paint(run, p[0], p[1], rgb);
+  run.ctx.putImageData(run.image, 0, 0);
+  for (const [p] of marks) paint(run, p[0], p[1], colour(run, p[0], p[1]));
+  const end = run.done ? (run.success ? ", succeeded" : ", stopped") : "";
+  run.label.textContent = `${run.name}: ${run.steps} steps, ${run.collisions} collisions, ` +
+    `${run.attacks} attacks, ${run.retrieved}/${run.items} retrieved${end}`;
+  run.div.className = run.done ? "run done" : "run";
+}
+
+async function inflate(text) {
+  const bytes = Uint8Array.from(atob(text), ch => ch.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+async function handle(msg) {
+  let run = runs[msg.id];
+  if (msg.type === "remove") {
+    if (run) { run.div.remove(); delete runs[msg.id]; }
+    return;
+  }
+  if (msg.type === "snapshot") {
+    if (!run) {
+      const div = document.createElement("div"), canvas = document.createElement("canvas");
+      const label = document.createElement("div");
+      div.append(canvas, label);
+      document.getElementById("runs").append(div);
+      run = runs[msg.id] = {div: div, canvas: canvas, ctx: canvas.getContext("2d"), label: label};
+    }
+    run.rows = msg.rows;
+    run.cols = msg.cols;
+    run.canvas.width = msg.cols;
+    run.canvas.height = msg.rows;
+    const scale = 300 / Math.max(msg.rows, msg.cols);
+    run.canvas.style.width = msg.cols * scale + "px";
+    run.canvas.style.height = msg.rows * scale + "px";
+    run.cells = await inflate(msg.cells);
+    run.image = run.ctx.createImageData(msg.cols, msg.rows);
+    for (let r = 0; r < msg.rows; r++) for (let c = 0; c < msg.cols; c++) paint(run, r, c, colour(run, r, c));
+  } else if (!run) {
+    return;
+  } else {
+    for (const [r, c, v] of msg.cells) {
+      run.cells[r * run.cols + c] = v;
+      paint(run, r, c, colour(run, r, c));
+    }
+  }
+  for (const k of FIELDS) if (k in msg) run[k] = msg[k];
+  draw(run);
+}
+
+function connect() {
+  const ws = new WebSocket(`ws://${location.host}/live`);
+  let queue = Promise.resolve();
+  ws.onopen = () => { document.getElementById("status").textContent = ""; };
+  ws.onmessage = e => { const msg = JSON.parse(e.data); queue = queue.then(() => handle(msg)); };
+  ws.onclose = () => {
+    document.getElementById("status").textContent = "disconnected, retrying";
+    document.getElementById("runs").replaceChildren();
+    runs = {};
+    setTimeout(connect, 2000);
+  };
+}
+connect();
+</script></body></html>
+"""
+
+
+RESULT_FIELDS = ["maze", "gameType", "robot", "seed", "steps", "collisions", "attacks", "retrieved", "items",
+                 "stopped", "success", "failure", "optimal"]
+JOB_FIELDS = ["robotSpec", "status"] + RESULT_FIELDS
+SUMMARY_STATS = ["steps", "collisions", "attacks", "retrieved", "success"]
+SUMMARY_FIELDS = ["robot", "maze", "gameType", "runs"] + [s + suffix for s in SUMMARY_STATS for suffix in ("", "Var")]
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class RobotTimeout(Exception):
+    """Raised when an out-of-process robot overruns its budget, crashes or raises."""
+    pass
+
+
+def loadRobot(spec):
+    """Resolve a "module:Class" or "path/to/file.py:Class" spec to a robot class."""
+    module, _, name = spec.rpartition(":")
+    if not module:
+        module, name = spec, "Robot"
+    if module.endswith(".py"):
+        modName = "cs255_robot_" + os.path.splitext(os.path.basename(module))[0]
+        importSpec = importlib.util.spec_from_file_location(modName, module)
+        mod = importlib.util.module_from_spec(importSpec)
+        importSpec.loader.exec_module(mod)
+    else:
+        mod = importlib.import_module(module)
+    return getattr(mod, name)
+
+
+def robotFactory(spec, moveBudget=None, cpuBudget=None):
+    """What GameState should call to make the robot of spec: the class itself, or if either budget is given a
+    RemoteRobot running it in its own process."""
+    if moveBudget or cpuBudget:
+        return functools.partial(RemoteRobot, spec, moveBudget, cpuBudget)
+    return loadRobot(spec)
+
+
+def robotName(spec):
+    """A short name for the robot of spec, for labels and leaderboards."""
+    module, _, name = spec.rpartition(":")
+    if not module:
+        module, name = spec, "Robot"
+    return "%s.%s" % (os.path.splitext(os.path.basename(module))[0], name)
+
+
+def _initWorker(tempRoot):
+    # Give every worker process a private temp directory so nothing on disk is shared between jobs
+    tempfile.tempdir = tempfile.mkdtemp(prefix="worker", dir=tempRoot)
+
+
+def _onAlarm(signum, frame):
+    raise JobTimeout()
+
+
+def runJob(job, maxSteps=MAX_STEPS, timeout=None, moveBudget=None, cpuBudget=None, runsDir=None):
+    """Run one (robotSpec, mazeFile, gameType, seed) job to completion and return its results row.
+
+    With a moveBudget or cpuBudget the robot runs in its own process, so a runaway robot is killed on its
+    own move rather than holding up the worker until the job timeout."""
+    robotSpec, maze, gT, seed = job
+    row = {"robotSpec": robotSpec, "seed": seed, "status": "ok", "maze": maze, "gameType": gT}
+    if timeout and hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _onAlarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    state = None
+    try:
+        robot = robotFactory(robotSpec, moveBudget, cpuBudget)
+        state = GameState(gT, maze, robot, verbose=False, checkpointInterval=0, seed=seed)
+        state.run(maxSteps)
+        if state.failure:
+            row["status"] = state.failure
+        if runsDir:
+            ReplayWriter(runsDir).save(state)
+    except JobTimeout:
+        row["status"] = "timeout"
+    except Exception as e:
+        row["status"] = "error: %s: %s" % (type(e).__name__, e)
+    finally:
+        if timeout and hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if state is not None:
+            state.close()
+    if state is not None:
+        row.update(state.result())
+        row["maze"] = maze
+        row["metrics"] = state.metrics
+    return row
+
+
+def _robotHost(conn, robotSpec, seed):
+    # Runs in the robot's own process: build the robot, then answer move requests until told to stop. Nothing else
+    # here draws from random, so seeding it once gives the robot the same choices on every run with this seed
+    random.seed(seed)
+    try:
+        robot = loadRobot(robotSpec)()
+    except Exception as e:
+        conn.send(("error", "%s: %s" % (type(e).__name__, e)))
+        return
+    conn.send(("ready", robot.name))
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            return
+        game, gameType, cpuBudget = msg
+        startCpu = time.process_time()
+        # The kernel delivers SIGPROF, killing us, once this move has used cpuBudget seconds of CPU. Not available
+        # on Windows, where an overrun is only noticed when the move returns
+        profile = cpuBudget and hasattr(signal, "setitimer")
+        if profile:
+            signal.setitimer(signal.ITIMER_PROF, cpuBudget)
+        try:
+            move = robot.nextMove(game, gameType)
+        except Exception as e:
+            conn.send(("error", "%s: %s" % (type(e).__name__, e)))
+            return
+        finally:
+            if profile:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+        used = time.process_time() - startCpu
+        if cpuBudget and used > cpuBudget:
+            conn.send(("cpu", used))
+            return
+        conn.send(("move", move))
+
+
+class RemoteRobot:
+    """Proxy for a robot running in a separate process.
+
+    Each call to nextMove sends the robot a snapshot of the game and waits at most moveBudget seconds of wall
+    time (and cpuBudget seconds of CPU time) for an answer. A robot that overruns is killed and RobotTimeout
+    raised. request and poll allow the GUI to wait for a move without blocking the Tk event loop."""
+
+    STARTUP_BUDGET = 30  # seconds allowed for importing and constructing the robot
+
+    def __init__(self, robotSpec, moveBudget=None, cpuBudget=None):
+        self.robotSpec = robotSpec
+        self.moveBudget = moveBudget
+        self.cpuBudget = cpuBudget
+        self.name = robotSpec
+        self.deadline = None
+        self.pending = False  # a move has been requested and not yet collected
+        self.conn, child = multiprocessing.Pipe()
+        # Drawn from the caller's random, which GameState.seeded points at the run's robot stream
+        seed = random.getrandbits(64)
+        self.process = multiprocessing.Process(target=_robotHost, args=(child, robotSpec, seed), daemon=True)
+        self.process.start()
+        child.close()
+        self.deadline = time.monotonic() + self.STARTUP_BUDGET
+        while True:
+            reply = self.poll()
+            if reply is not None:
+                break
+            time.sleep(0.01)
+        self.name = reply
+
+    def request(self, game, gameType):
+        """Send the robot a snapshot of game and start its move clock."""
+        if self.pending:
+            self.wait()  # An earlier request was given up on; its answer must not be taken for this one
+        self.conn.send((game, gameType, self.cpuBudget))
+        self.deadline = time.monotonic() + self.moveBudget if self.moveBudget else None
+        self.pending = True
+
+    def poll(self):
+        """The robot's answer if it has arrived, otherwise None. Raises RobotTimeout if the robot overran."""
+        try:
+            ready = self.conn.poll()
+            if ready:
+                kind, value = self.conn.recv()
+        except (EOFError, OSError):
+            ready, kind, value = True, "died", None
+        if not ready:
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                self.close()
+                raise RobotTimeout("exceeded move budget of %gs" % (self.moveBudget or self.STARTUP_BUDGET))
+            return None
+        self.deadline = None
+        self.pending = False
+        if kind == "ready" or kind == "move":
+            return value
+        self.close()
+        if kind == "cpu":
+            raise RobotTimeout("exceeded CPU budget of %gs (used %.3fs)" % (self.cpuBudget, value))
+        if kind == "error":
+            raise RobotTimeout("raised " + value)
+        if self.cpuBudget and self.process.exitcode == -getattr(signal, "SIGPROF", 0):
+            raise RobotTimeout("exceeded CPU budget of %gs" % self.cpuBudget)
+        raise RobotTimeout("robot process died (exit code %s)" % self.process.exitcode)
+
+    def nextMove(self, game, gameType):
+        self.request(game, gameType)
+        return self.wait()
+
+    def wait(self):
+        while True:
+            timeout = None if self.deadline is None else max(0, self.deadline - time.monotonic())
+            self.conn.poll(timeout)
+            move = self.poll()
+            if move is not None:
+                return move
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(0.1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.pending = False
+
+
+def makeJobs(robotSpecs, mazeDir, gameTypes=(1, 2, 3), seeds=(0,)):
+    """The full robot x maze x gameType x seed matrix, with absolute maze paths so workers need no shared cwd."""
+    return [(spec, os.path.abspath(maze), gT, seed)
+            for spec in robotSpecs for maze in findMazes(mazeDir) for gT in gameTypes for seed in seeds]
+
+
+def runParallel(jobs, workers=None, maxSteps=MAX_STEPS, timeout=None, moveBudget=None, cpuBudget=None,
+                runsDir=None):
+    """Fan jobs out over a process pool, yielding their results rows in the order of jobs, each as soon as its job
+    and every job before it has finished.
+
+    A job whose worker dies breaks the pool, failing every job still in it. Those jobs are run again, each in a
+    pool of its own with up to workers at once, and only a job that dies on its own is reported as crashed."""
+    finished = {}
+    done = 0
+    for (i, row) in _runPools(list(enumerate(jobs)), workers, (maxSteps, timeout, moveBudget, cpuBudget, runsDir)):
+        finished[i] = row
+        while done in finished:
+            yield finished.pop(done)
+            done += 1
+
+
+def _runPools(jobs, workers, args):
+    # Yields (index, row) for each of the (index, job) pairs of jobs, in the order they finish
+    broken = []
+    with tempfile.TemporaryDirectory(prefix="cs255_") as tempRoot:
+        with _jobPool(workers, tempRoot) as pool:
+            pending = {pool.submit(runJob, job, *args): (i, job) for (i, job) in jobs}
+            for future in futures.as_completed(pending):
+                (i, job) = pending[future]
+                try:
+                    yield (i, future.result())
+                except futures.BrokenExecutor:
+                    broken.append((i, job))
+                except Exception as e:
+                    yield (i, _crashedRow(job, e))
+        limit = workers or os.cpu_count() or 1
+        running = {}  # future -> (index, job, the pool running only that job)
+        try:
+            while broken or running:
+                while broken and len(running) < limit:
+                    (i, job) = broken.pop(0)
+                    pool = _jobPool(1, tempRoot)
+                    running[pool.submit(runJob, job, *args)] = (i, job, pool)
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    (i, job, pool) = running.pop(future)
+                    pool.shutdown()
+                    try:
+                        yield (i, future.result())
+                    except Exception as e:
+                        yield (i, _crashedRow(job, e))
+        finally:
+            for (i, job, pool) in running.values():
+                pool.shutdown(cancel_futures=True)
+
+
+def _jobPool(workers, tempRoot):
+    return futures.ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(tempRoot,))
+
+
+def _crashedRow(job, error):
+    # The worker itself died (e.g. the robot crashed the interpreter), so there is no row from runJob
+    robotSpec, maze, gT, seed = job
+    return {"robotSpec": robotSpec, "maze": maze, "gameType": gT, "seed": seed, "status": "crashed: %s" % error}
+
+
+def findMazes(mazeDir):
+    """Every *.maze, *.txt and binary maze file below mazeDir, in a stable order."""
+    found = []
+    for root, dirs, files in os.walk(mazeDir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".maze") or name.endswith(".txt") or isBinaryMaze(name):
+                found.append(os.path.join(root, name))
+    return found
+
+
+def runBatch(robot, mazeDir, gameTypes=(1, 2, 3), out=sys.stdout, maxSteps=MAX_STEPS, metrics=None, runsDir=None,
+             concurrency=BATCH_CONCURRENCY, serve=None, seeds=(0,)):
+    """Run robot over every maze in mazeDir for each game type and seed and write a CSV results table to out.
+
+    Up to concurrency runs are played at once on one Engine. Rows are written in maze, game type and seed order,
+    with absolute maze paths as in a parallel batch, each as soon as its run and every run before it has finished.
+    Step timings from every run are gathered into metrics, every run saved as a replay in runsDir, and the runs
+    shown live on localhost port serve, if given."""
+    writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS)
+    writer.writeheader()
+    runs = [(os.path.abspath(maze), gT, seed) for maze in findMazes(mazeDir) for gT in gameTypes for seed in seeds]
+    finished = {}
+    results = []
+    engine = Engine()
+    if metrics is not None:
+        engine.subscribe(MetricsRecorder(metrics))
+    if runsDir:
+        engine.subscribe(ReplayWriter(runsDir))
+    server = None
+    if serve is not None:
+        server = LiveServer(engine, serve)
+        print("Watch the runs at http://127.0.0.1:%d/" % server.port, file=sys.stderr)
+
+    async def playAll():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def playOne(i, maze, gT, seed):
+            async with limit:
+                state = GameState(gT, maze, robot, verbose=False, checkpointInterval=0, seed=seed)
+                try:
+                    await engine.play(state, maxSteps)
+                finally:
+                    state.close()
+                finished[i] = state.result()
+                while len(results) in finished:
+                    results.append(finished.pop(len(results)))
+                    writer.writerow(results[-1])
+
+        await asyncio.gather(*[playOne(i, *run) for (i, run) in enumerate(runs)])
+
+    try:
+        engine.run(playAll())
+    finally:
+        if server is not None:
+            server.close()
+        engine.close()
+    return results
+
+
+def summariseRuns(rows):
+    """One SUMMARY_FIELDS row per robot, maze and game type: how many runs finished, and the mean and variance
+    over them (usually one per seed) of each of SUMMARY_STATS. Rows without results, such as crashed jobs, are
+    left out."""
+    groups = collections.OrderedDict()
+    for row in rows:
+        if "steps" not in row:
+            continue
+        key = (row.get("robotSpec") or row["robot"], row["maze"], row["gameType"])
+        groups.setdefault(key, []).append(row)
+    summary = []
+    for ((robot, maze, gT), runs) in groups.items():
+        line = {"robot": robot, "maze": maze, "gameType": gT, "runs": len(runs)}
+        for stat in SUMMARY_STATS:
+            values = [float(run[stat]) for run in runs]
+            line[stat] = statistics.fmean(values)
+            line[stat + "Var"] = statistics.variance(values) if len(values) > 1 else 0.0
+        summary.append(line)
+    return summary
+
+
+def writeSummary(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summariseRuns(rows))
+
+
+class ScriptedRobot:
+    """Deterministic robot for benchmarks, which keeps its right hand on the wall until it reaches the goal. Its
+    moves depend only on the board, so every run over the same maze makes the same moves."""
+    name = "Scripted"
+    HEADINGS = ["NORTH", "EAST", "SOUTH", "WEST"]
+    STEPS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+
+    def __init__(self):
+        self.heading = 0
+
+    def nextMove(self, game, gameType):
+        (r, c) = game.getCurrentLocation()
+        if [r, c] == list(game.getGoal()):
+            return "STOP"
+        board = game.board
+        for turn in (1, 0, 3, 2):  # right, ahead, left, back
+            h = (self.heading + turn) % 4
+            (nr, nc) = (r + self.STEPS[h][0], c + self.STEPS[h][1])
+            if 0 <= nr < board.rows and 0 <= nc < board.cols and board.scanSpace(nr, nc) != 1:
+                self.heading = h
+                return self.HEADINGS[h]
+        return "STOP"  # Walled in
+
+
+class OffscreenImage:
+    """Stand-in for tk.PhotoImage that only records the pixels put into it."""
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+        self.puts = 0
+
+    def width(self):
+        return self.size[0]
+
+    def height(self):
+        return self.size[1]
+
+    def put(self, data, to=None):
+        self.puts += 1
+
+
+class OffscreenCanvas:
+    """Stand-in for tk.Canvas that keeps its items in a dict, so that BoardView can be timed without a display.
+    It does the same bookkeeping work per call as a real canvas would, but none of the drawing."""
+
+    def __init__(self):
+        self.items = {}  # id -> [coords, options]
+        self.nextId = 1
+
+    def create(self, coords, options):
+        self.items[self.nextId] = [coords, options]
+        self.nextId += 1
+        return self.nextId - 1
+
+    def create_rectangle(self, *coords, **options):
+        return self.create(coords, options)
+
+    create_oval = create_line = create_image = create_rectangle
+
+    def itemconfig(self, item, **options):
+        self.items[item][1].update(options)
+
+    def coords(self, item, *coords):
+        if not coords:
+            return list(self.items[item][0])
+        self.items[item][0] = coords
+
+    def delete(self, tag):
+        if tag == "all":
+            self.items.clear()
+        elif isinstance(tag, int):
+            self.items.pop(tag, None)
+        else:
+            for item in [i for (i, (coords, options)) in self.items.items() if options.get("tag") == tag]:
+                del self.items[item]
+
+    def tag_raise(self, tag):
+        pass
+
+    def update(self):
+        pass
+
+
+class OffscreenView(BoardView):
+    PhotoImage = OffscreenImage
+
+
+def benchScenarios(sizes=BENCH_SIZES, seed=0):
+    """(name, gameType, generator arguments) of every benchmark: for each size an empty-handed run on a random
+    maze, and a game type 3 run on the same maze crowded with enemies."""
+    for n in sizes:
+        maze = {"rows": n, "cols": n, "algorithm": "density", "density": 0.2, "items": 0, "seed": seed}
+        yield ("%dx%d" % (n, n), 1, dict(maze, enemies=0))
+        yield ("%dx%d-enemies" % (n, n), 3, dict(maze, enemies=max(4, n // 5)))
+
+
+def benchScenario(gameType, generator, canvas, steps=BENCH_STEPS, frames=BENCH_FRAMES):
+    """Time ScriptedRobot playing the generated maze, drawn on canvas, for one round. Returns robot moves per
+    second (including the game engine), milliseconds per full_render and per partial_render frame. Each is timed
+    for at least BENCH_MIN_TIME, giving the mean move and frame and the median render."""
+    random.seed(generator["seed"])  # Enemies move at random
+    state = GameState(gameType, {"generator": generator}, ScriptedRobot, verbose=False)
+    view = (OffscreenView if isinstance(canvas, OffscreenCanvas) else BoardView)(canvas, state, 800, 800)
+    row = {}
+    made = 0
+    elapsed = 0
+    while made < steps or elapsed < BENCH_MIN_TIME:
+        if state.done:
+            state.restart()  # The robot found the goal, so go round again
+        start = time.perf_counter()
+        state.nextAction()
+        elapsed += time.perf_counter() - start
+        made += 1
+    row["steps_per_sec"] = made / elapsed
+    state.restart()
+    renders = []
+    while not renders or sum(renders) < BENCH_MIN_TIME:
+        start = time.perf_counter()
+        view.full_render()
+        canvas.update()
+        renders.append(time.perf_counter() - start)
+    row["full_render_ms"] = statistics.median(renders) * 1000
+    elapsed = 0
+    drawn = 0
+    while (drawn < frames or elapsed < BENCH_MIN_TIME) and not state.done:
+        state.nextAction()
+        start = time.perf_counter()
+        view.partial_render()
+        canvas.update()
+        elapsed += time.perf_counter() - start
+        drawn += 1
+    row["frame_ms"] = elapsed * 1000 / max(drawn, 1)
+    state.close()
+    return row
+
+
+def runBench(sizes=BENCH_SIZES, seed=0, out=sys.stdout):
+    """Run every benchmark scenario, printing a table to out, and return the results by scenario name.
+
+    The board is drawn on a Tk canvas if there is a display (such as one from xvfb-run), otherwise on an
+    OffscreenCanvas. Peak memory is the most Python allocated at once while building the maze and playing it,
+    measured with tracemalloc on a separate, untimed run."""
+    root = None
+    if HAVE_TK:
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            pass  # No display
+    if root is not None:
+        canvas = tk.Canvas(root, width=800, height=800)
+        canvas.pack()
+        kind = "Tk"
+    else:
+        canvas = OffscreenCanvas()
+        kind = "offscreen"
+    print("Canvas: " + kind, file=out)
+    print("%-20s %12s %12s %10s %10s" % ("scenario", "steps/sec", "render ms", "frame ms", "peak KB"), file=out)
+    scenarios = list(benchScenarios(sizes, seed))
+    rounds = collections.defaultdict(list)
+    results = {}
+    try:
+        for i in range(BENCH_REPEAT):
+            # Every round plays every scenario once, so a spell when the machine is unusually slow or fast
+            # affects only one round of each rather than every round of one
+            for (name, gameType, generator) in scenarios:
+                rounds[name].append(benchScenario(gameType, generator, canvas))
+        for (name, gameType, generator) in scenarios:
+            row = {}
+            for k in rounds[name][0]:
+                values = [r[k] for r in rounds[name]]
+                row[k] = statistics.median(values)
+                # How far the rounds strayed either side of the median, as a fraction of it
+                row[k + "_noise"] = (max(values) - min(values)) / 2 / row[k] if row[k] else 0.0
+            MAZE_CACHE.clear()
+            tracemalloc.start()
+            benchScenario(gameType, generator, OffscreenCanvas(), BENCH_STEPS // 10, BENCH_FRAMES // 10)
+            row["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+            print("%-20s %12.0f %12.2f %10.3f %10.0f" % (name, row["steps_per_sec"], row["full_render_ms"],
+                                                         row["frame_ms"], row["peak_kb"]), file=out)
+            results[name] = row
+            out.flush()
+        MAZE_CACHE.clear()
+    finally:
+        if root is not None:
+            root.destroy()
+    return {"canvas": kind, "python": sys.version.split()[0], "results": results}
+
+
+def compareBench(bench, baseline, tolerance=BENCH_TOLERANCE):
+    """Descriptions of every result in bench more than tolerance (a fraction) worse than the same one in baseline.
+
+    The rounds of a benchmark can differ by more than tolerance on a busy machine, so a result must also be worse
+    by more than its rounds strayed from their median in the two runs together. Times of a fraction of a millisecond
+    and small peaks vary by more than tolerance between processes, so render and frame times are only compared once
+    they are BENCH_NOISE_MS or more slower and peak memory once it is BENCH_NOISE_KB or more higher."""
+    worse = []
+    for (name, row) in bench["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        for metric in ("steps_per_sec", "full_render_ms", "frame_ms", "peak_kb"):
+            if not old.get(metric):
+                continue
+            if metric.endswith("_ms") and row[metric] - old[metric] < BENCH_NOISE_MS:
+                continue
+            if metric == "peak_kb" and row[metric] - old[metric] < BENCH_NOISE_KB:
+                continue
+            change = row[metric] / old[metric] - 1
+            if metric == "steps_per_sec":
+                change = -change  # Fewer steps a second is worse
+            noise = row.get(metric + "_noise", 0) + old.get(metric + "_noise", 0)
+            if change > tolerance + noise:
+                worse.append("%s %s: %.4g, baseline %.4g (%.0f%% worse, %.0f%% noise)" %
+                             (name, metric, row[metric], old[metric], change * 100, noise * 100))
+    return worse
+
+
+PATH = ''
+if getattr(sys, 'frozen', False):
+    PATH = os.path.dirname(sys.executable)
+elif __file__:
+    PATH = os.path.dirname(__file__)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Graphical environment for CS255 maze robots")
+    parser.add_argument("--batch", metavar="DIR", help="run the robot over every maze in DIR without the GUI")
+    parser.add_argument("--out", metavar="FILE",
+                        help="write the batch results table (or benchmark results) to FILE instead of stdout")
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS, help="moves allowed before a run is abandoned")
+    parser.add_argument("--robot", action="append", metavar="SPEC",
+                        help="robot to play as module:Class or file.py:Class (repeatable for batches and tournaments, "
+                             "default Robot:Robot)")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="run the batch over N worker processes (0 for one per CPU)")
+    parser.add_argument("--seeds", type=int, default=1, metavar="K",
+                        help="run every batch job with K seeds, counting up from --seed")
+    parser.add_argument("--summary", metavar="FILE",
+                        help="write the mean and variance over seeds of each robot, maze and game type to FILE")
+    parser.add_argument("--timeout", type=float, metavar="SECS", help="wall-clock limit for each parallel job")
+    parser.add_argument("--move-budget", type=float, metavar="SECS",
+                        help="run the robot in its own process and stop it if one move takes longer than SECS")
+    parser.add_argument("--cpu-budget", type=float, metavar="SECS",
+                        help="run the robot in its own process and stop it if one move uses more than SECS of CPU")
+    parser.add_argument("--generate", metavar="DIR", help="write generated mazes to DIR instead of starting the GUI")
+    parser.add_argument("--convert", nargs=2, metavar=("SOURCE", "DEST"),
+                        help="copy the maze SOURCE to DEST, converting between text and binary (%s) mazes by their "
+                             "names, or every maze in directory SOURCE into directory DEST" % BINARY_MAZE_EXT)
+    parser.add_argument("--binary", action="store_true",
+                        help="write generated mazes, or directories of --convert mazes, in the binary format")
+    parser.add_argument("--bits", action="store_true",
+                        help="store binary mazes with one bit per cell instead of one byte")
+    parser.add_argument("--no-compress", dest="compress", action="store_false",
+                        help="store binary mazes uncompressed, so their cells can be used straight from the file")
+    parser.add_argument("--count", type=int, default=1, help="number of mazes to generate")
+    parser.add_argument("--rows", type=int, default=20, help="rows of generated mazes")
+    parser.add_argument("--cols", type=int, default=20, help="columns of generated mazes")
+    parser.add_argument("--algorithm", choices=sorted(GENERATORS), default="density", help="maze generator to use")
+    parser.add_argument("--density", type=float, default=0.2, help="wall density for the density generator")
+    parser.add_argument("--items", type=int, default=0, help="objects placed in each generated maze")
+    parser.add_argument("--enemies", type=int, default=0, help="enemies placed in each generated maze")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the first generated maze, benchmark maze or batch run (default 0), or the seed "
+                             "enemies and robots draw their random choices from in the GUI (default unseeded)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write step phase timings of the --batch or --headless run to FILE (JSON if it ends in "
+                             ".json, else CSV)")
+    parser.add_argument("--save-runs", metavar="DIR", help="save every batch run as a .run replay file in DIR")
+    parser.add_argument("--bench", action="store_true",
+                        help="time the engine and renderer on generated mazes instead of starting the GUI")
+    parser.add_argument("--bench-sizes", metavar="N,N,...", help="rows (and columns) of the benchmark mazes")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare the benchmark with results saved in FILE by --out, failing if any are worse")
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE,
+                        help="fraction by which a benchmark may be worse than the baseline before it fails")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="show the game, or an in-process batch, live in a browser at http://127.0.0.1:PORT/")
+    parser.add_argument("--tournament", metavar="MAZE",
+                        help="play every --robot side by side on copies of MAZE, with the same --seed for each")
+    parser.add_argument("--game-type", type=int, choices=(1, 2, 3), default=3, help="game type to play (default 3)")
+    parser.add_argument("--maze", metavar="FILE", help="maze to play (without it the GUI asks for one)")
+    parser.add_argument("--headless", action="store_true",
+                        help="play --maze with the robot without the GUI, exiting with status 0 if it succeeded")
+    args = parser.parse_args()
+    remote = args.move_budget or args.cpu_budget
+    firstSeed = args.seed or 0
+    specs = args.robot or [DEFAULT_ROBOT]
+    if args.metrics and not (args.batch or args.headless):
+        parser.error("--metrics only works with --batch or --headless; the GUI shows the same timings itself")
+    if args.generate:
+        if not boardFits(args.rows, args.cols, args.algorithm):
+            parser.error("a %dx%d %s board has no room for both a start and a goal"
+                         % (args.rows, args.cols, args.algorithm))
+        os.makedirs(args.generate, exist_ok=True)
+        for seed in range(firstSeed, firstSeed + args.count):
+            grid = generateGrid(args.rows, args.cols, args.algorithm, args.density, args.items, args.enemies, seed)
+            name = "%s-%dx%d-%d" % (args.algorithm, args.rows, args.cols, seed)
+            path = os.path.join(args.generate, name)
+            if args.binary:
+                writeMaze(grid, path + BINARY_MAZE_EXT, args.bits, args.compress)
+            else:
+                gameFromGrid(grid, 3 if args.enemies else 1).board.writeBoard(path + ".maze")
+        sys.exit(0)
+    if args.convert:
+        (source, dest) = args.convert
+        if os.path.isdir(source):
+            for maze in findMazes(source):
+                (stem, ext) = os.path.splitext(os.path.relpath(maze, source))
+                target = os.path.join(dest, stem + (BINARY_MAZE_EXT if args.binary else ".maze"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                convertMaze(maze, target, args.bits, args.compress, args.game_type)
+        else:
+            convertMaze(source, dest, args.bits, args.compress, args.game_type)
+        sys.exit(0)
+    if args.bench:
+        sizes = [int(n) for n in args.bench_sizes.split(",")] if args.bench_sizes else BENCH_SIZES
+        bench = runBench(sizes, firstSeed)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(bench, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                worse = compareBench(bench, json.load(f), args.tolerance)
+            for line in worse:
+                print("Slower than baseline: " + line)
+            sys.exit(1 if worse else 0)
+        sys.exit(0)
+    if args.batch:
+        out = open(args.out, "w", newline="") if args.out else sys.stdout
+        metrics = StepMetrics()
+        seeds = range(firstSeed, firstSeed + args.seeds)
+        if args.workers is None and len(specs) == 1 and not remote:
+            rows = runBatch(loadRobot(specs[0]), args.batch, out=out, maxSteps=args.max_steps, metrics=metrics,
+                            runsDir=args.save_runs, serve=args.serve, seeds=seeds)
+        else:
+            if args.serve is not None:
+                parser.error("--serve only works for batches run in this process")
+            jobs = makeJobs(specs, args.batch, seeds=seeds)
+            writer = csv.DictWriter(out, fieldnames=JOB_FIELDS)
+            writer.writeheader()
+            rows = []
+            for row in runParallel(jobs, args.workers or None, args.max_steps, args.timeout, args.move_budget,
+                                   args.cpu_budget, args.save_runs):
+                if "metrics" in row:
+                    metrics.merge(row.pop("metrics"))
+                writer.writerow(row)
+                out.flush()
+                rows.append(row)
+        if out is not sys.stdout:
+            out.close()
+        if args.metrics:
+            metrics.export(args.metrics)
+        if args.summary:
+            writeSummary(rows, args.summary)
+        sys.exit(0)
+    if args.headless:
+        if not args.maze:
+            parser.error("--headless needs a --maze")
+        state = GameState(args.game_type, args.maze, robotFactory(specs[0], args.move_budget, args.cpu_budget),
+                          checkpointInterval=0, seed=args.seed)
+        try:
+            state.run(args.max_steps)
+        finally:
+            state.close()
+        if not state.done:
+            print("Abandoned after %d moves" % state.game.movesMade)
+        if args.metrics:
+            state.metrics.export(args.metrics)
+        if args.out:
+            with open(args.out, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+                writer.writeheader()
+                writer.writerow(state.result())
+        sys.exit(0 if state.success else 1)
+    if not HAVE_TK:
+        parser.error("this Python has no tkinter, so only --headless, --batch, --generate and --bench work")
+    try:
+        ROOT = tk.Tk()
+    except tk.TclError as e:
+        parser.error("cannot open a window (%s), so only --headless, --batch, --generate and --bench work" % e)
+    if args.tournament:
+        if args.serve is not None:
+            parser.error("--serve does not work with --tournament")
+        states = [GameState(args.game_type, args.tournament, robotFactory(spec, args.move_budget, args.cpu_budget),
+                            verbose=False, seed=firstSeed) for spec in specs]
+        ROOT.title("Tournament")
+        tournament = TournamentApp(ROOT, states, [robotName(spec) for spec in specs])
+        ROOT.mainloop()
+        tournament.close()
+        for state in states:
+            state.close()
+        sys.exit(0)
+    mazeFile = args.maze
+    if mazeFile is None:
+        # Ask before anything is loaded, so no time is spent parsing and drawing a maze that is not wanted
+        ROOT.withdraw()
+        mazeFile = tkf.askopenfilename(parent=ROOT, initialdir=os.path.join(PATH, 'exampleMazes'),
+                                       title="Select Maze", filetypes=MAZE_FILETYPES)
+        if not mazeFile:
+            sys.exit(0)
+        ROOT.deiconify()
+    gameState = GameState(args.game_type, mazeFile, robotFactory(specs[0], args.move_budget, args.cpu_budget),
+                          seed=args.seed)
     render = MazeApp(ROOT, gameState)
+    if args.serve is not None:
+        render.serve(args.serve)
     ROOT.mainloop()
+    render.close()
+    gameState.close()
@@ -0,0 +1,23 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# renderMaze itself, and stand-ins for the coursework's Search and Robot modules. Worker processes are forked, so
+# they see the same path.
+sys.path[:0] = [os.path.dirname(HERE), os.path.join(HERE, "stubs")]
+
+
+@pytest.fixture
+def mazeDir(tmp_path):
+    """A copy of the test mazes, so that the oracle files written beside them stay out of the tree."""
+    path = tmp_path / "mazes"
+    shutil.copytree(os.path.join(HERE, "mazes"), path)
+    return str(path)
+
+
+@pytest.fixture
+def maze(mazeDir):
+    return os.path.join(mazeDir, "GameType1", "m0.maze")
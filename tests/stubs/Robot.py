@@ -0,0 +1,14 @@
+# Stand-in for the coursework Robot module: moves at random and stops after 200 moves.
+import random
+
+
+class Robot:
+    def __init__(self):
+        self.name = "Stub"
+        self.n = 0
+
+    def nextMove(self, game, gameType):
+        self.n += 1
+        if game.atGoal() or self.n > 200:
+            return "STOP"
+        return random.choice(["NORTH", "SOUTH", "EAST", "WEST"])
@@ -0,0 +1,129 @@
+# Minimal stand-in for the coursework Search module, so the tests run without it. Only what renderMaze uses is here.
+import random
+
+DIRS = {"NORTH": (-1, 0), "SOUTH": (1, 0), "EAST": (0, 1), "WEST": (0, -1)}
+
+
+class Space:
+    def __init__(self, v):
+        self.v = v
+
+    def scanSpace(self):
+        return self.v
+
+    def updateSpace(self, v):
+        self.v = v
+
+
+class Board:
+    def __init__(self, rows, cols):
+        self.row, self.col = rows, cols
+        self.room = [[Space(0) for _ in range(cols)] for _ in range(rows)]
+        self.start = [0, 0]
+        self.goal = [rows - 1, cols - 1]
+        self.totalItems = 0
+
+    def scanSpace(self, r, c):
+        return self.room[r][c].scanSpace()
+
+    def updateSpace(self, r, c, v):
+        self.room[r][c].updateSpace(v)
+
+    def writeBoard(self, path):
+        with open(path, "w") as f:
+            f.write("%d %d\n" % (self.row, self.col))
+            for r in self.room:
+                f.write(" ".join(str(s.v) for s in r) + "\n")
+
+
+class Enemy:
+    def __init__(self, r, c, tactic):
+        self.currRow, self.currCol, self.tactic = r, c, tactic
+
+
+class Game:
+    def __init__(self, gameType=1, file="", rows=10, cols=10, density=0.2, items=0, eTups=[]):
+        self.gameType = gameType
+        if file:
+            with open(file) as f:
+                rows, cols = map(int, f.readline().split())
+                self.board = Board(rows, cols)
+                for r in range(rows):
+                    for c, v in enumerate(f.readline().split()):
+                        v = int(v)
+                        self.board.updateSpace(r, c, v)
+                        if v == 3:
+                            self.board.start = [r, c]
+                        if v == 2:
+                            self.board.goal = [r, c]
+                        if v == 4:
+                            self.board.totalItems += 1
+        else:
+            self.board = Board(rows, cols)
+            for r in range(rows):
+                for c in range(cols):
+                    if random.random() < density:
+                        self.board.updateSpace(r, c, 1)
+            self.board.updateSpace(0, 0, 3)
+            self.board.updateSpace(rows - 1, cols - 1, 2)
+            for _ in range(items):
+                r, c = random.randrange(rows), random.randrange(cols)
+                if self.board.scanSpace(r, c) == 0:
+                    self.board.updateSpace(r, c, 4)
+                    self.board.totalItems += 1
+        self.rows, self.cols = self.board.row, self.board.col
+        self.enemyList = []
+        for t in eTups:
+            self.enemyList.append(Enemy(t[0], t[1], t[2]))
+            self.board.updateSpace(t[0], t[1], 5)
+        if gameType == 3 and not eTups:
+            for r in range(self.rows):
+                for c in range(self.cols):
+                    if self.board.scanSpace(r, c) == 5:
+                        self.enemyList.append(Enemy(r, c, "random"))
+        self.currentRow, self.currentCol = self.board.start
+        self.movesMade = self.collisions = self.enemyCollisions = self.itemsRetrieved = 0
+        self.totalItems = self.board.totalItems
+        self.carrying = False
+
+    def numberOfObjs(self):
+        return self.totalItems
+
+    def getGoal(self):
+        return self.board.goal
+
+    def getStart(self):
+        return self.board.start
+
+    def getCurrentLocation(self):
+        return [self.currentRow, self.currentCol]
+
+    def robotCarrying(self):
+        return self.carrying
+
+    def atGoal(self):
+        return [self.currentRow, self.currentCol] == self.board.goal
+
+    def moveRobot(self, d, verbose=False):
+        self.movesMade += 1
+        dr, dc = DIRS[d]
+        r, c = self.currentRow + dr, self.currentCol + dc
+        if not (0 <= r < self.rows and 0 <= c < self.cols) or self.board.scanSpace(r, c) == 1:
+            self.collisions += 1
+            return
+        if self.board.scanSpace(r, c) == 5:
+            self.enemyCollisions += 1
+        if self.board.scanSpace(r, c) == 4:
+            self.board.updateSpace(r, c, 0)
+            self.itemsRetrieved += 1
+            self.carrying = True
+        self.currentRow, self.currentCol = r, c
+
+    def moveEnemyRobots(self, verbose=False):
+        for e in self.enemyList:
+            dr, dc = random.choice(list(DIRS.values()))
+            r, c = e.currRow + dr, e.currCol + dc
+            if 0 <= r < self.rows and 0 <= c < self.cols and self.board.scanSpace(r, c) == 0:
+                self.board.updateSpace(e.currRow, e.currCol, 0)
+                self.board.updateSpace(r, c, 5)
+                e.currRow, e.currCol = r, c
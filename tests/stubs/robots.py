@@ -0,0 +1,45 @@
+# Robots for the tests, given to renderMaze as "robots:Name" specs.
+import os
+import random
+
+import Robot
+
+
+class Wander(Robot.Robot):
+    """Moves at random and never stops, so a run lasts as long as the test wants."""
+
+    def nextMove(self, game, gameType):
+        self.n += 1
+        return random.choice(["NORTH", "SOUTH", "EAST", "WEST"])
+
+
+class Sweep(Robot.Robot):
+    """Sweeps the rows back and forth with the odd random step, so objects keep being picked up all run."""
+
+    def nextMove(self, game, gameType):
+        self.n += 1
+        if random.random() < 0.1:
+            return random.choice(["NORTH", "SOUTH", "EAST", "WEST"])
+        if self.n % 45 == 0:
+            return "SOUTH"
+        return "EAST" if self.n // 45 % 2 == 0 else "WEST"
+
+
+class Burn:
+    """Spins forever on its third move."""
+    name = "Burn"
+
+    def nextMove(self, game, gameType):
+        while game.movesMade >= 2:
+            pass
+        return "EAST"
+
+
+class Die:
+    """Kills its whole process on its third move."""
+    name = "Die"
+
+    def nextMove(self, game, gameType):
+        if game.movesMade >= 2:
+            os._exit(3)
+        return "EAST"
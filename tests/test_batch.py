@@ -0,0 +1,36 @@
+import csv
+import io
+import os
+
+import renderMaze as rm
+import robots
+
+
+def readTable(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_runBatch_writes_one_row_per_run_in_order(mazeDir):
+    out = io.StringIO()
+    rows = rm.runBatch(robots.Wander, mazeDir, out=out, maxSteps=50, seeds=range(2))
+    table = readTable(out.getvalue())
+    keys = [(row["maze"], int(row["gameType"]), int(row["seed"])) for row in table]
+    assert len(keys) == 3 * 3 * 2
+    assert keys == sorted(keys)
+    assert all(os.path.isabs(maze) for (maze, gT, seed) in keys)
+    assert [row["maze"] for row in rows] == [maze for (maze, gT, seed) in keys]
+    assert all(row["steps"] == "50" and row["stopped"] == "False" for row in table)
+
+
+def test_runBatch_is_repeatable_for_a_seed(mazeDir):
+    (first, second) = (io.StringIO(), io.StringIO())
+    rm.runBatch(robots.Wander, mazeDir, out=first, maxSteps=100, seeds=[3])
+    rm.runBatch(robots.Wander, mazeDir, out=second, maxSteps=100, seeds=[3])
+    assert first.getvalue() == second.getvalue()
+
+
+def test_summary_averages_over_seeds(mazeDir):
+    rows = rm.runBatch(robots.Wander, mazeDir, out=io.StringIO(), maxSteps=30, seeds=range(3))
+    summary = rm.summariseRuns(rows)
+    assert len(summary) == 3 * 3
+    assert all(line["runs"] == 3 and line["steps"] == 30 and line["stepsVar"] == 0 for line in summary)
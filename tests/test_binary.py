@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+import renderMaze as rm
+
+
+@pytest.mark.parametrize("bits", [False, True])
+@pytest.mark.parametrize("compress", [False, True])
+def test_binary_maze_round_trip(tmp_path, bits, compress):
+    grid = rm.generateGrid(37, 53, "rooms", items=5, enemies=3, seed=2)
+    path = str(tmp_path / "m.bmaze")
+    rm.writeMaze(grid, path, bits, compress)
+    with rm.MazeFile(path) as f:
+        copy = f.grid()
+        rows = list(f.iterRows())
+        row = f.row(5)
+    assert copy.cells == grid.cells
+    assert (copy.start, copy.goal) == (grid.start, grid.goal)
+    assert sorted(copy.objects) == sorted(grid.objects) and copy.enemies == grid.enemies
+    assert len(rows) == grid.rows
+    if not bits:
+        assert row == bytes(grid.cells[5 * grid.cols:6 * grid.cols])
+        assert b"".join(rows) == bytes(grid.cells)
+
+
+def test_compressed_rows_are_read_a_block_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(rm, "BINARY_BLOCK", 1000)
+    grid = rm.generateGrid(200, 300, "binary", seed=1)
+    path = str(tmp_path / "m.bmaze")
+    rm.writeMaze(grid, path)
+    with rm.MazeFile(path) as f:
+        assert f.blockRows == 3 and len(f.blocks) == 68
+        for r in (199, 0, 100, 101):
+            assert f.row(r) == bytes(grid.cells[r * 300:(r + 1) * 300])
+            assert len(f.last[1]) <= 3 * 300
+
+
+def test_text_mazes_convert_both_ways(maze, tmp_path):
+    binary = str(tmp_path / "m.bmaze")
+    text = str(tmp_path / "m.maze")
+    rm.convertMaze(maze, binary)
+    rm.convertMaze(binary, text)
+    with open(maze) as a, open(text) as b:
+        assert a.read() == b.read()
+
+
+def test_binary_mazes_play_like_text_ones(maze, tmp_path):
+    binary = str(tmp_path / "m.bmaze")
+    rm.convertMaze(maze, binary)
+    results = []
+    for path in (maze, binary):
+        state = rm.GameState(3, path, rm.loadRobot("Robot"), verbose=False, seed=5)
+        state.run(100)
+        results.append(dict(state.result(), maze=None))
+        state.close()
+    assert results[0] == results[1]
+    assert binary in rm.findMazes(str(tmp_path))
+
+
+def test_files_of_other_kinds_are_refused(tmp_path):
+    path = str(tmp_path / "m.bmaze")
+    with open(path, "wb") as f:
+        f.write(bytes(rm.BINARY_HEADER.size))
+    with pytest.raises(ValueError):
+        rm.MazeFile(path)
+    assert os.path.exists(path)
@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+import renderMaze as rm
+
+
+@pytest.mark.parametrize("budget", [0.05, 0.3])
+def test_cpu_budget_stops_a_robot_on_the_move_that_overruns(maze, budget):
+    state = rm.GameState(1, maze, rm.robotFactory("robots:Burn", None, budget), verbose=False)
+    start = time.monotonic()
+    state.run(50)
+    elapsed = time.monotonic() - start
+    state.close()
+    assert state.failure.startswith("exceeded CPU budget")
+    assert state.game.movesMade == 2
+    assert elapsed < budget + 0.5
+
+
+def test_move_budget_stops_a_robot_that_takes_too_long(maze):
+    state = rm.GameState(1, maze, rm.robotFactory("robots:Burn", 0.2), verbose=False)
+    state.run(50)
+    state.close()
+    assert state.failure == "exceeded move budget of 0.2s"
+
+
+def test_a_robot_that_dies_is_stopped(maze):
+    state = rm.GameState(1, maze, rm.robotFactory("robots:Die", 5), verbose=False)
+    state.run(50)
+    state.close()
+    assert state.done and not state.success
+    assert state.failure.startswith("robot process died")
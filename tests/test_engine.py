@@ -0,0 +1,58 @@
+import time
+
+import renderMaze as rm
+import robots
+
+
+def movesIn(maze, delay, window=0.5, fps=60):
+    """Moves made in window seconds by a play with delay between moves, polled the way MazeApp polls."""
+    state = rm.GameState(1, maze, robots.Wander, verbose=False)
+    engine = rm.Engine()
+    engine.start(state, delay=delay)
+    end = time.perf_counter() + window
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        engine.poll(0.8 / fps)
+        time.sleep(max(0.0, start + 1.0 / fps - time.perf_counter()))
+    engine.close()
+    state.close()
+    return state.game.movesMade
+
+
+def test_move_rate_follows_the_delay_below_a_frame(maze):
+    fast = movesIn(maze, 0.001)
+    slow = movesIn(maze, 0.011)
+    assert 0.5 * 0.5 / 0.011 < slow < 1.1 * 0.5 / 0.011
+    assert fast > 3 * slow
+
+
+def test_poll_returns_at_once_when_nothing_is_due(maze):
+    state = rm.GameState(1, maze, robots.Wander, verbose=False)
+    engine = rm.Engine()
+    engine.start(state, delay=1)
+    engine.poll(0.1)
+    start = time.perf_counter()
+    engine.poll(0.2)
+    assert time.perf_counter() - start < 0.1
+    assert state.game.movesMade == 1
+    engine.close()
+    state.close()
+
+
+def test_play_stops_after_the_moves_asked_for(maze):
+    state = rm.GameState(1, maze, robots.Wander, verbose=False)
+    engine = rm.Engine()
+    events = []
+    engine.subscribe(events.append, state)
+    engine.run(engine.play(state, moves=25))
+    engine.close()
+    assert state.game.movesMade == 25
+    assert len(events) == 25 and events[-1].finished
+
+
+def test_lockstep_moves_every_state_once_a_round(mazeDir):
+    states = [rm.GameState(1, maze, robots.Wander, verbose=False) for maze in rm.findMazes(mazeDir)]
+    engine = rm.Engine()
+    engine.run(engine.lockstep(states, rounds=10))
+    engine.close()
+    assert [s.game.movesMade for s in states] == [10] * len(states)
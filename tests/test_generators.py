@@ -0,0 +1,46 @@
+import pytest
+
+import renderMaze as rm
+
+
+@pytest.mark.parametrize("algorithm", sorted(rm.GENERATORS))
+def test_every_generator_makes_a_solvable_board(algorithm):
+    for seed in range(5):
+        grid = rm.generateGrid(31, 47, algorithm, 0.3, items=6, enemies=3, seed=seed)
+        reached = rm.floodFill(grid, grid.start)
+        assert grid.start != grid.goal
+        assert grid.scanSpace(*grid.start) == 3 and grid.scanSpace(*grid.goal) == 2
+        assert reached[grid.goal[0] * grid.cols + grid.goal[1]]
+        for (r, c) in grid.objects:
+            assert grid.scanSpace(r, c) == 4 and reached[r * grid.cols + c]
+        for (r, c, tactic) in grid.enemies:
+            assert grid.scanSpace(r, c) == 5 and tactic in rm.GENERATED_TACTICS
+
+
+def test_generating_is_repeatable_for_a_seed():
+    assert rm.generateGrid(40, 40, "rooms", seed=9).cells == rm.generateGrid(40, 40, "rooms", seed=9).cells
+    assert rm.generateGrid(40, 40, "rooms", seed=9).cells != rm.generateGrid(40, 40, "rooms", seed=10).cells
+
+
+@pytest.mark.parametrize("algorithm", sorted(rm.GENERATORS))
+def test_boards_too_small_for_a_start_and_goal_are_refused(algorithm):
+    with pytest.raises(ValueError):
+        rm.generateGrid(1, 1, algorithm)
+
+
+def test_floodFill_stops_at_walls():
+    grid = rm.Grid(3, 5)
+    for r in range(3):
+        grid.updateSpace(r, 2, 1)
+    reached = rm.floodFill(grid, [1, 0])
+    assert [reached[r * 5:r * 5 + 5] for r in range(3)] == [bytearray([1, 1, 0, 0, 0])] * 3
+    grid.updateSpace(2, 2, 0)
+    assert sum(rm.floodFill(grid, [1, 0])) == 13
+
+
+def test_enemies_are_only_on_the_board_in_game_type_3():
+    grid = rm.generateGrid(20, 20, "density", 0.1, enemies=4, seed=1)
+    for gameType in (1, 2, 3):
+        board = rm.packBoard(rm.gameFromGrid(grid, gameType)).board
+        enemyCells = board.cells.count(5)
+        assert enemyCells == (4 if gameType == 3 else 0)
@@ -0,0 +1,65 @@
+import itertools
+import json
+import random
+
+import renderMaze as rm
+
+
+def corridor(cols, start, goal, objects=()):
+    grid = rm.Grid(1, cols)
+    grid.start = [0, start]
+    grid.goal = [0, goal]
+    grid.objects = [[0, c] for c in objects]
+    return grid
+
+
+def test_shortest_goes_round_walls():
+    grid = rm.Grid(3, 3)
+    grid.updateSpace(0, 1, 1)
+    grid.updateSpace(1, 1, 1)
+    grid.start = [0, 0]
+    grid.goal = [0, 2]
+    assert rm.Oracle(grid).shortest() == 6
+    grid.updateSpace(2, 1, 1)
+    assert rm.Oracle(grid).shortest() is None
+
+
+def test_tour_visits_every_object():
+    assert rm.Oracle(corridor(5, 2, 4, [0])).tour()[:2] == (6, [0])
+    assert rm.Oracle(corridor(5, 2, 4)).tour()[0] == 2
+
+
+def test_exact_tour_matches_every_order():
+    rng = random.Random(4)
+    for _ in range(5):
+        grid = rm.generateGrid(15, 15, "density", 0.15, items=6, seed=rng.randrange(1000))
+        oracle = rm.Oracle(grid)
+        points = [grid.start] + grid.objects + [grid.goal]
+        dist = [[oracle.distances(p)[q[0] * grid.cols + q[1]] for q in points] for p in points]
+        best = min(sum(dist[a][b] for (a, b) in zip((0,) + order, order + (len(points) - 1,)))
+                   for order in itertools.permutations(range(1, len(points) - 1)))
+        (moves, order, exact) = oracle.tour()
+        assert exact and moves == best and sorted(order) == list(range(6))
+
+
+def test_large_tours_are_estimated_with_a_real_order():
+    grid = rm.generateGrid(30, 30, "density", 0.1, items=rm.Oracle.EXACT_OBJECTS + 3, seed=2)
+    (moves, order, exact) = rm.Oracle(grid).tour()
+    assert not exact and sorted(order) == list(range(len(grid.objects)))
+    assert moves >= rm.Oracle(grid).shortest()
+
+
+def test_answers_are_kept_beside_the_maze_for_the_game_types_asked_for(maze):
+    game = rm.MAZE_CACHE.load({"gameType": 1, "file": maze})
+    shortest = rm.OracleCache().optimal(game, 1, maze)
+    with open(maze + ".oracle.json") as f:
+        assert json.load(f)["optimal"] == {"1": shortest, "3": shortest}
+    cache = rm.OracleCache()
+    solved = []
+    solve = cache.solve
+    cache.solve = lambda game, gameType: solved.append(gameType) or solve(game, gameType)
+    assert cache.optimal(game, 3, maze) == shortest
+    assert cache.optimal(game, 2, maze) >= shortest
+    assert solved == [2]
+    with open(maze + ".oracle.json") as f:
+        assert set(json.load(f)["optimal"]) == {"1", "2", "3"}
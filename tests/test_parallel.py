@@ -0,0 +1,25 @@
+import io
+
+import renderMaze as rm
+import robots
+
+
+def test_parallel_rows_match_an_in_process_batch(mazeDir):
+    inProcess = rm.runBatch(robots.Wander, mazeDir, out=io.StringIO(), maxSteps=40, seeds=range(2))
+    jobs = rm.makeJobs(["robots:Wander"], mazeDir, seeds=range(2))
+    pooled = list(rm.runParallel(jobs, workers=2, maxSteps=40))
+    assert [row["status"] for row in pooled] == ["ok"] * len(jobs)
+    for row in pooled:
+        del row["robotSpec"], row["status"], row["metrics"]
+    assert pooled == inProcess
+
+
+def test_only_the_job_that_kills_its_worker_is_crashed(mazeDir):
+    jobs = rm.makeJobs(["robots:Wander", "robots:Die"], mazeDir)
+    rows = list(rm.runParallel(jobs, workers=2, maxSteps=40))
+    assert [(row["robotSpec"], row["maze"], row["gameType"], row["seed"]) for row in rows] == jobs
+    for row in rows:
+        if row["robotSpec"] == "robots:Die":
+            assert row["status"].startswith("crashed")
+        else:
+            assert row["status"] == "ok" and row["steps"] == 40
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import renderMaze as rm
+
+
+def test_a_saved_run_plays_back_exactly(maze, tmp_path):
+    live = rm.GameState(3, maze, rm.loadRobot("Robot"), verbose=False, seed=2)
+    live.run()
+    path = str(tmp_path / "a.run")
+    live.saveRun(path)
+    replay = rm.ReplayState(path, verbose=False)
+    replay.run()
+    assert list(replay.moveList) == list(live.moveList)
+    assert dict(replay.result(), maze="", robot="") == dict(live.result(), maze="", robot="", seed=None)
+    tempFile = replay.tempFile
+    replay.close()
+    live.close()
+    assert not os.path.exists(tempFile)
+
+
+def test_files_that_are_not_replays_are_refused(tmp_path):
+    path = str(tmp_path / "bad.run")
+    with open(path, "wb") as f:
+        f.write(bytes(rm.RunLog.HEADER.size))
+    with pytest.raises(ValueError):
+        rm.ReplayState(path, verbose=False)
@@ -0,0 +1,78 @@
+import pytest
+
+import renderMaze as rm
+import robots
+
+
+def openMaze(tmp_path, rows=40, cols=40):
+    """A text maze scattered with objects, so that moves all through a run keep changing the board."""
+    cells = [0] * (rows * cols)
+    for i in range(7, rows * cols - 1, 5):
+        if i % 11:
+            cells[i] = 4 if i % 3 else 1
+    cells[0] = 3
+    cells[-1] = 2
+    path = str(tmp_path / "open.maze")
+    with open(path, "w") as f:
+        f.write("%d %d\n" % (rows, cols))
+        for r in range(rows):
+            f.write(" ".join(map(str, cells[r * cols:(r + 1) * cols])) + "\n")
+    return path
+
+
+def state(gs):
+    """Everything about the game a rewind must put back, including Search's own board."""
+    board = gs.game.board
+    search = [board.board.scanSpace(r, c) for r in range(board.rows) for c in range(board.cols)]
+    return (bytes(board.cells), search, gs.game.getCurrentLocation(), gs.enemyPositions(), gs.game.collisions,
+            gs.game.itemsRetrieved, gs.game.movesMade)
+
+
+def play(gs, n):
+    while len(gs.moveList) <= n and not gs.done:
+        gs.nextAction()
+
+
+@pytest.mark.parametrize("gameType", [2, 3])
+def test_seeking_back_and_forth_matches_a_fresh_playback(tmp_path, gameType):
+    live = rm.GameState(gameType, openMaze(tmp_path), robots.Sweep, verbose=False, seed=3)
+    live.run(1400)
+    path = str(tmp_path / "sweep.run")
+    live.saveRun(path)
+    live.close()
+    replay = rm.ReplayState(path, verbose=False)
+    for n in (1300, 10, 700, 600, 1200, 499, 501, 1000):
+        replay.seek(n)
+        fresh = rm.ReplayState(path, verbose=False)
+        fresh.seek(n)
+        assert state(replay) == state(fresh), n
+        fresh.close()
+    replay.close()
+
+
+def test_rewinding_a_run_matches_playing_it_to_there(tmp_path):
+    maze = openMaze(tmp_path, 30, 30)
+    ref = {}
+    fresh = rm.GameState(3, maze, robots.Wander, verbose=False, checkpointInterval=50, seed=7)
+    for n in (30, 75, 120, 160):
+        play(fresh, n)
+        ref[n] = state(fresh)
+    live = rm.GameState(3, maze, robots.Wander, verbose=False, checkpointInterval=50, seed=7)
+    play(live, 180)
+    assert [c.length for c in live.checkpoints] == [50, 100, 150]
+    for n in (160, 120, 75, 30):
+        live.rewind(n)
+        assert state(live) == ref[n] and len(live.moveList) == n + 1
+    live.restart()
+    play(live, 120)
+    assert state(live) == ref[120]
+
+
+def test_restart_keeps_edits_to_the_board(maze):
+    live = rm.GameState(1, maze, robots.Wander, verbose=False)
+    assert live.editSquare(1, 0, 1)
+    play(live, 60)
+    live.restart()
+    assert live.game.board.scanSpace(0, 1) == 1 and live.game.board.board.scanSpace(0, 1) == 1
+    assert rm.MAZE_CACHE.load(live.gameArgs).board.scanSpace(0, 1) == 0
+    live.close()
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+import renderMaze as rm
+import robots
+
+MAZE = {"generator": {"rows": 20, "cols": 20, "algorithm": "rooms", "seed": 4, "items": 4, "enemies": 3}}
+
+
+def state(gs):
+    return (bytes(gs.game.board.cells), gs.game.getCurrentLocation(), gs.enemyPositions(), gs.game.collisions,
+            gs.game.enemyCollisions, [entry[:3] for entry in gs.moveList])
+
+
+def play(gs, n):
+    while len(gs.moveList) <= n and not gs.done:
+        gs.nextAction()
+
+
+def test_a_seed_gives_the_same_run_whatever_else_uses_random():
+    runs = []
+    for noise in (1, 2):
+        gs = rm.GameState(3, MAZE, robots.Wander, verbose=False, seed=7)
+        random.seed(noise)
+        play(gs, 150)
+        runs.append(state(gs))
+    assert runs[0] == runs[1]
+
+
+@pytest.mark.parametrize("n", [30, 120, 260])
+def test_carrying_on_after_a_rewind_makes_the_same_moves(n):
+    whole = rm.GameState(3, MAZE, robots.Wander, verbose=False, checkpointInterval=50, seed=7)
+    play(whole, 300)
+    rewound = rm.GameState(3, MAZE, robots.Wander, verbose=False, checkpointInterval=50, seed=7)
+    play(rewound, 200)
+    rewound.rewind(n)
+    play(rewound, 300)
+    assert state(rewound) == state(whole)
+
+
+def test_out_of_process_robots_repeat_for_a_seed():
+    runs = []
+    for _ in range(2):
+        gs = rm.GameState(3, MAZE, rm.robotFactory("Robot", 5), verbose=False, seed=7)
+        gs.run(1000)
+        gs.close()
+        runs.append(state(gs))
+    assert runs[0] == runs[1]
+
+
+def test_rewinding_an_out_of_process_robot_starts_it_again():
+    robot = rm.robotFactory("Robot", 5)
+    whole = rm.GameState(3, MAZE, robot, verbose=False, checkpointInterval=50, seed=7)
+    whole.run(1000)
+    rewound = rm.GameState(3, MAZE, robot, verbose=False, checkpointInterval=50, seed=7)
+    play(rewound, 150)
+    rewound.rewind(60)
+    assert len(rewound.moveList) == 61
+    rewound.run(1000)
+    # The stub robot stops after 200 moves of its own, so it must have been shown the replayed moves again
+    assert state(rewound) == state(whole) and whole.moveList[len(whole.moveList) - 1][2] == "STOP"
+    whole.close()
+    rewound.close()